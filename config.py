@@ -22,7 +22,39 @@ class Config:
 
     DATABASE_URI = environ.get('DATABASE_URI')
 
+    # Seconds the home page charts (and their rendered HTML) are cached for; 0 rebuilds them on every request.
+    HOME_CHARTS_TTL = int(environ.get('HOME_CHARTS_TTL', 300))
+
+    # Path of the memory repository's catalogue snapshot; leave unset to always load from csv.
+    CATALOGUE_SNAPSHOT = environ.get('CATALOGUE_SNAPSHOT')
+
     echo_string = environ.get('SQLALCHEMY_ECHO')
     SQLALCHEMY_ECHO = False
     if echo_string.lower().strip() == "true":
-        SQLALCHEMY_ECHO = True
\ No newline at end of file
+        SQLALCHEMY_ECHO = True
+
+    # Serve the catalogue and description pages from async views that run their independent queries concurrently
+    # on an asyncio engine (database repository with SQLite only; needs the aiosqlite and asgiref packages).
+    ASYNC_VIEWS = environ.get('ASYNC_VIEWS', 'False').lower().strip() == "true"
+
+    # Per-request statement counts and timings in the X-Query-* response headers (.env turns them on for
+    # development); the /debug/queries endpoint that lists the recent requests' slowest statements is off unless
+    # QUERY_STATS_ENDPOINT is set.
+    QUERY_STATS = environ.get('QUERY_STATS', 'False').lower().strip() == "true"
+    QUERY_STATS_ENDPOINT = environ.get('QUERY_STATS_ENDPOINT', 'False').lower().strip() == "true"
+
+    # Threads the database repository runs a request's independent queries on (the description page loads its
+    # podcast and its episodes side by side); 0 runs them one after another on the request's thread.
+    QUERY_FANOUT_WORKERS = int(environ.get('QUERY_FANOUT_WORKERS', 4))
+
+    # Database connection pool
+    DATABASE_POOL_SIZE = int(environ.get('DATABASE_POOL_SIZE', 5))
+    DATABASE_MAX_OVERFLOW = int(environ.get('DATABASE_MAX_OVERFLOW', 10))
+    DATABASE_POOL_RECYCLE = int(environ.get('DATABASE_POOL_RECYCLE', 3600))
+    DATABASE_POOL_PRE_PING = environ.get('DATABASE_POOL_PRE_PING', 'True').lower().strip() == "true"
+
+    # SQLite pragmas applied to every new connection
+    SQLITE_JOURNAL_MODE = environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE = int(environ.get('SQLITE_CACHE_SIZE', -16000))       # negative values are in KiB
+    SQLITE_MMAP_SIZE = int(environ.get('SQLITE_MMAP_SIZE', 268435456))
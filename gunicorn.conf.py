@@ -0,0 +1,28 @@
+"""Gunicorn settings for serving the app with several worker processes: gunicorn -c gunicorn.conf.py
+
+The app is created once in the master process (preload_app), so in memory mode the catalogue is built once and
+shared copy-on-write with every worker instead of each worker reading the csv files into its own copy.
+"""
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def when_ready(server):
+    # Everything the master built so far (the app and its catalogue) goes into the permanent generation. The
+    # workers' garbage collections then never visit those objects, which would write to their headers and copy
+    # the shared pages into every worker.
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Pooled database connections must not be shared between processes; the worker opens its own.
+    engine = server.app.wsgi().extensions.get('database_engine')
+    if engine is not None:
+        engine.dispose(close=False)
@@ -0,0 +1,86 @@
+"""Reports how much memory the MemoryRepository catalogue takes, in total and per domain object, and what each
+object would take if its attributes were kept in __slots__ instead of an instance dict.
+
+Run from the project directory:
+
+    python measure_memory.py [podcasts.csv episodes.csv]
+"""
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+from podcast.adapters.datareader.csvdatareader import CSVDataReader
+from podcast.adapters.service.memory_repository import MemoryRepository
+from podcast.domainmodel import model
+from podcast.domainmodel.model import Author, Category, Episode, Podcast, Review, User
+
+DATA_PATH = Path('podcast') / 'adapters' / 'data'
+
+SAMPLE_SIZE = 10000
+
+
+def allocated_by(build):
+    """Bytes still allocated after build() returns, and build()'s result."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated, result
+
+
+def bytes_per_object(factory):
+    # The attribute values are created up front and shared, so only the objects themselves are counted.
+    allocated, _ = allocated_by(lambda: [factory(i) for i in range(SAMPLE_SIZE)])
+    list_overhead = sys.getsizeof([None] * SAMPLE_SIZE)
+    return (allocated - list_overhead) / SAMPLE_SIZE
+
+
+def slotted(cls, sample):
+    """A copy of cls that keeps the attributes sample has in __slots__, with no instance dict."""
+    namespace = {name: value for name, value in vars(cls).items() if name not in ('__dict__', '__weakref__')}
+    namespace['__slots__'] = tuple(vars(sample))
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+def object_factories():
+    author = Author(1, 'Author')
+    podcast = Podcast(1, author, 'Title', 'image', 'description', 'website', 1, 'English')
+    user = User(1, 'user', 'password')
+    return {
+        Author: lambda cls, i: cls(i, 'Author'),
+        Category: lambda cls, i: cls(i, 'Category'),
+        Podcast: lambda cls, i: cls(i, author, 'Title', 'image', 'description', 'website', i, 'English'),
+        Episode: lambda cls, i: cls(i, podcast, 'Title', 60, '2024-01-01', 'description', 'audio link'),
+        Review: lambda cls, i: cls(i, 5, 'comment', user, podcast),
+    }
+
+
+def measure(podcasts_file, episodes_file):
+    repository = MemoryRepository()
+    allocated, _ = allocated_by(lambda: repository.load_data(CSVDataReader(podcasts_file, episodes_file)))
+    objects = len(repository.podcasts) + len(repository.episodes) + len(repository.authors) + \
+        len(repository.categories)
+    print(f'catalogue: {allocated / 2 ** 20:.2f} MiB for {objects} podcasts, episodes, authors and categories, '
+          f'indexes and attribute values included')
+
+    print(f'{"":>10}  {"dict":>6}  {"slots":>6}  bytes per object')
+    for cls, factory in object_factories().items():
+        slotted_cls = slotted(cls, factory(cls, 0))
+        with_dict = bytes_per_object(lambda i: factory(cls, i))
+        # the copy stands in for the class in its module while measured, so the model's isinstance checks pass
+        setattr(model, cls.__name__, slotted_cls)
+        try:
+            with_slots = bytes_per_object(lambda i: factory(slotted_cls, i))
+        finally:
+            setattr(model, cls.__name__, cls)
+        print(f'{cls.__name__:>10}: {with_dict:6.0f}  {with_slots:6.0f}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        measure(sys.argv[1], sys.argv[2])
+    else:
+        measure(DATA_PATH / 'podcasts.csv', DATA_PATH / 'episodes.csv')
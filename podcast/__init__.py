@@ -1,10 +1,12 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from _testcapi import test_config
 from pathlib import Path
 from flask import Flask
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import inspect
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker, clear_mappers
-from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from podcast.adapters import repository_populate
 from podcast.adapters.datareader.csvdatareader import CSVDataReader
@@ -14,8 +16,11 @@ from podcast.adapters.service import memory_repository
 # local imports
 import podcast.adapters.repository as repo
 from podcast.adapters.database_repository import SqlAlchemyRepository
+from podcast.adapters.async_database_repository import AsyncSqlAlchemyRepository
+from podcast.adapters.database_engine import create_database_engine, create_async_database_engine
+from podcast.adapters.query_stats import init_query_stats, instrument_engine
 from podcast.adapters.repository_populate import populate
-from podcast.adapters.orm import mapper_registry, map_model_to_tables
+from podcast.adapters.orm import mapper_registry, map_model_to_tables, upgrade_schema
 
 def create_app(test_config=None):
     """Construct the core application."""
@@ -30,6 +35,7 @@ def create_app(test_config=None):
     data_path = Path('adapters') / 'data'
 
     clear_mappers()
+    repo.async_repo_instance = None
 
     # if not test_config:
     #     # Load test configuration, and override any configuration settings.
@@ -41,22 +47,41 @@ def create_app(test_config=None):
         repo.repo_instance = memory_repository.MemoryRepository()
         # fill the content of the repository from the provided csv files (has to be done every time we start app!)
         database_mode = False
-        repository_populate.populate(data_path, None, repo.repo_instance, database_mode)
+        # a snapshot of the built catalogue, when configured, lets later boots skip re-parsing the csv files
+        snapshot_path = app.config['CATALOGUE_SNAPSHOT']
+        repository_populate.populate(data_path, None, repo.repo_instance, database_mode, snapshot_path)
 
     if app.config['REPOSITORY'] == 'database':
-        # database_uri = 'sqlite:///podcasts.db'
-        database_uri = app.config['DATABASE_URI']
-
-        database_echo = app.config['SQLALCHEMY_ECHO']
-
-        # Create a database engine and connect it to the specified database
-        database_engine = create_engine(database_uri, connect_args={"check_same_thread": False}, poolclass=NullPool, echo=database_echo)
+        # Create a pooled database engine for DATABASE_URI, tuned by the pool and SQLite settings in config.Config
+        database_engine = create_database_engine(app.config)
 
         # Create the database session factory using sessionmaker
         session_factory = sessionmaker(autocommit=False, autoflush=True, bind=database_engine)
 
+        # Kept so a pre-forking server can drop the connections its master opened (see gunicorn.conf.py)
+        app.extensions['database_engine'] = database_engine
+
+        if app.config['QUERY_STATS']:
+            # Count and time each request's SQL, reported in the X-Query-Count and X-Query-Time headers
+            init_query_stats(app, database_engine)
+
         # Set the repository instance to the SqlAlchemyRepository
         repo.repo_instance = SqlAlchemyRepository(session_factory)
+
+        if app.config['QUERY_FANOUT_WORKERS'] > 0 and not isinstance(database_engine.pool, StaticPool):
+            # Threads for running a request's independent queries side by side, each on its own pooled connection.
+            # They start on first use, so a preloading gunicorn master forks before any exist. An in-memory
+            # database has a single shared connection, so its queries stay on the request's thread.
+            repo.repo_instance.executor = ThreadPoolExecutor(max_workers=app.config['QUERY_FANOUT_WORKERS'],
+                                                             thread_name_prefix='query-fanout')
+
+        if app.config['ASYNC_VIEWS']:
+            # The catalogue and description pages are then served by async views on an asyncio engine
+            async_engine = create_async_database_engine(app.config)
+            repo.async_repo_instance = AsyncSqlAlchemyRepository(
+                async_sessionmaker(async_engine, expire_on_commit=False))
+            if app.config['QUERY_STATS']:
+                instrument_engine(async_engine.sync_engine)
         data_path = Path('adapters') / 'data'
 
         if app.config['TESTING'] == 'True' or len(inspect(database_engine).get_table_names()) == 0:
@@ -77,9 +102,16 @@ def create_app(test_config=None):
             populate(data_path, session_factory, repo.repo_instance, database_mode=True)  # Pass the session_factory here
             print("REPOPULATING DATABASE... FINISHED")
         else:
+            # Add any columns and indexes declared since the database was created.
+            upgrade_schema(database_engine)
             # Solely generate mappings that map domain model classes to the database tables.
             map_model_to_tables()
 
+        @app.teardown_appcontext
+        def close_database_session(exception=None):
+            # Hand the request's pooled connection back instead of holding it until the thread's next request.
+            repo.repo_instance.close_session()
+
     with app.app_context():
         from .home import home
         app.register_blueprint(home.home_blueprint)
@@ -96,4 +128,8 @@ def create_app(test_config=None):
         from .account import account
         app.register_blueprint(account.account_blueprint)
 
+        if repo.async_repo_instance is not None:
+            app.view_functions['podcasts_bp.podcasts'] = podcasts.podcasts_async
+            app.view_functions['description_bp.description'] = description.description_async
+
     return app
\ No newline at end of file
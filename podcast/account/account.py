@@ -20,25 +20,11 @@ def account(username):
     per_page_ep = 4
     per_page_pod = 2
 
-    my_playlist = repository.get_playlist(user)
+    my_playlist = repository.get_playlist_summary(user)
+    episodes = repository.get_playlist_episodes_page(user, page_ep, per_page_ep)
+    podcasts = repository.get_playlist_podcasts_page(user, page_pod, per_page_pod)
     reviews = repository.get_user_reviews(username)
 
-    # Pagination for episodes
-    list_of_episodes = my_playlist.episodes
-    start_ep = (page_ep - 1) * per_page_ep
-    end_ep = start_ep + per_page_ep
-    paginated_episodes = list_of_episodes[start_ep:end_ep]
-    total_episodes = len(my_playlist.episodes)
-    total_pages_ep = (total_episodes + per_page_ep - 1) // per_page_ep
-
-    # Pagination for podcasts
-    list_of_podcasts = my_playlist.podcasts
-    start_pod = (page_pod - 1) * per_page_pod
-    end_pod = start_pod + per_page_pod
-    paginated_podcasts = list_of_podcasts[start_pod:end_pod]
-    total_podcasts = len(list_of_podcasts)
-    total_pages_pod = (total_podcasts + per_page_pod - 1) // per_page_pod
-
     # back button for podcastDescription link
     catalogue_page = request.args.get('catalogue_page', 1, type=int)
 
@@ -48,15 +34,15 @@ def account(username):
         user=user,
         playlist=my_playlist,
         reviews=reviews,
-        episodes=paginated_episodes,
+        episodes=episodes.items,
         page=page_ep,
-        total_pages=total_pages_ep,
-        total_episodes=total_episodes,
+        total_pages=episodes.total_pages,
+        total_episodes=episodes.total,
         per_page_ep=per_page_ep,
-        podcasts=paginated_podcasts,
+        podcasts=podcasts.items,
         page_pod=page_pod,
-        total_pages_pod=total_pages_pod,
-        total_podcasts=total_podcasts,
+        total_pages_pod=podcasts.total_pages,
+        total_podcasts=podcasts.total,
         per_page_pod=per_page_pod,
 
         cat_page=catalogue_page
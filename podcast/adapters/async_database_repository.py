@@ -0,0 +1,80 @@
+import asyncio
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from podcast.adapters.database_repository import podcasts_query, podcast_details_query, episodes_page_queries, \
+    podcasts_page_queries
+from podcast.adapters.orm import podcast_table, reviews_table
+from podcast.adapters.repository import AbstractAsyncRepository, Page, PodcastDetails, format_average_rating
+from podcast.domainmodel.model import Podcast, Review
+
+
+class AsyncSqlAlchemyRepository(AbstractAsyncRepository):
+    """AbstractAsyncRepository on SQLAlchemy's asyncio engine.
+
+    Every method opens its own AsyncSession, so independent calls can be awaited together with asyncio.gather.
+    Sessions are made with expire_on_commit=False and closed before returning; the objects come back detached,
+    with everything the templates read eagerly loaded.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+
+    async def get_podcast(self, podcast_id: int) -> Podcast:
+        async with self._session_factory() as session:
+            result = await session.scalars(podcasts_query().where(podcast_table.c.podcast_id == podcast_id))
+            return result.unique().first()
+
+    async def get_podcasts_page(self, page, per_page, search_title=None, category_id=None, author_id=None,
+                                title_id=None) -> Page:
+        count_stmt, page_stmt = podcasts_page_queries(page, per_page, search_title=search_title,
+                                                      category_id=category_id, author_id=author_id,
+                                                      title_id=title_id)
+        total, podcasts = await asyncio.gather(self._scalar(count_stmt), self._podcasts(page_stmt))
+        return Page(podcasts, total, max(page, 1), per_page)
+
+    async def get_episodes_page_by_podcast_id(self, podcast_id: int, page: int, per_page: int) -> Page:
+        page_stmt, count_stmt = episodes_page_queries(podcast_id, page, per_page)
+        async with self._session_factory() as session:
+            rows = (await session.execute(page_stmt)).all()
+            total = rows[0].total if rows else await session.scalar(count_stmt)
+        return Page([row[0] for row in rows], total, max(page, 1), per_page)
+
+    async def get_reviews_by_podcast(self, podcast_id: int) -> List[Review]:
+        stmt = (select(Review).where(reviews_table.c.podcast_id == podcast_id)
+                .options(joinedload(Review._Review__user)))
+        async with self._session_factory() as session:
+            return list((await session.scalars(stmt)).unique())
+
+    async def get_average_rating(self, podcast_id: int) -> str:
+        stmt = (select(podcast_table.c.review_count, podcast_table.c.rating_total)
+                .where(podcast_table.c.podcast_id == podcast_id))
+        async with self._session_factory() as session:
+            row = (await session.execute(stmt)).first()
+        return format_average_rating(*row) if row is not None else format_average_rating(0, 0)
+
+    async def get_podcast_details(self, podcast_id: int, episode_page: int, per_page: int) -> PodcastDetails:
+        # The podcast (with its author, categories and reviews) and the page of episodes load concurrently.
+        podcast, episodes = await asyncio.gather(
+            self._podcasts(podcast_details_query(podcast_id)),
+            self.get_episodes_page_by_podcast_id(podcast_id, episode_page, per_page),
+        )
+        if not podcast:
+            return None
+        podcast = podcast[0]
+        return PodcastDetails(
+            podcast=podcast,
+            episodes=episodes,
+            reviews=list(podcast.reviews),
+            average_rating=format_average_rating(podcast._review_count, podcast._rating_total),
+        )
+
+    async def _scalar(self, stmt):
+        async with self._session_factory() as session:
+            return await session.scalar(stmt)
+
+    async def _podcasts(self, stmt) -> List[Podcast]:
+        async with self._session_factory() as session:
+            return list((await session.scalars(stmt)).unique())
@@ -0,0 +1,88 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+
+
+def create_database_engine(config):
+    """Creates the engine for config['DATABASE_URI'] with a connection pool and, for SQLite, tuned pragmas.
+
+    config is the Flask app config (or any mapping with the same keys); missing pool and pragma settings fall
+    back to the defaults below.
+    """
+    database_uri = config['DATABASE_URI']
+    url = make_url(database_uri)
+
+    options = {
+        'echo': config.get('SQLALCHEMY_ECHO', False),
+        'pool_pre_ping': config.get('DATABASE_POOL_PRE_PING', True),
+        'pool_recycle': config.get('DATABASE_POOL_RECYCLE', 3600),
+    }
+
+    if url.get_backend_name() == 'sqlite':
+        options['connect_args'] = {'check_same_thread': False}
+        if url.database in (None, '', ':memory:'):
+            # every connection to an in-memory database would get its own empty database, so share one
+            options['poolclass'] = StaticPool
+        else:
+            options['poolclass'] = QueuePool
+
+    if options.get('poolclass') is not StaticPool:
+        options['pool_size'] = config.get('DATABASE_POOL_SIZE', 5)
+        options['max_overflow'] = config.get('DATABASE_MAX_OVERFLOW', 10)
+
+    engine = create_engine(database_uri, **options)
+
+    if url.get_backend_name() == 'sqlite':
+        event.listen(engine, 'connect', _sqlite_pragma_setter(_sqlite_pragmas(config)))
+
+    return engine
+
+
+# The asyncio drivers to swap in for DATABASE_URI's synchronous ones.
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def create_async_database_engine(config):
+    """Creates an asyncio engine for the same database as create_database_engine, for the async views.
+
+    Flask runs each async view in an event loop of its own, and pooled asyncio connections must not be shared
+    between loops, so connections are not pooled. Raises ValueError for backends without an asyncio driver here.
+    """
+    url = make_url(config['DATABASE_URI'])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No asyncio driver configured for {backend} databases.')
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        raise ValueError('The async views need a database file; an in-memory SQLite database is not shared.')
+
+    engine = create_async_engine(url.set(drivername=ASYNC_DRIVERS[backend]),
+                                 echo=config.get('SQLALCHEMY_ECHO', False), poolclass=NullPool)
+
+    if backend == 'sqlite':
+        event.listen(engine.sync_engine, 'connect', _sqlite_pragma_setter(_sqlite_pragmas(config)))
+
+    return engine
+
+
+def _sqlite_pragmas(config):
+    return {
+        'journal_mode': config.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': config.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': config.get('SQLITE_CACHE_SIZE', -16000),
+        'mmap_size': config.get('SQLITE_MMAP_SIZE', 268435456),
+    }
+
+
+def _sqlite_pragma_setter(pragmas):
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if value is not None and value != '':
+                    cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return set_sqlite_pragmas
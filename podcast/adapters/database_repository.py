@@ -1,14 +1,91 @@
+import contextvars
+import time
 from abc import ABC
 from typing import List
-from sqlalchemy.orm import scoped_session, joinedload
+from sqlalchemy.orm import scoped_session, joinedload, selectinload
 from sqlalchemy.orm.exc import NoResultFound
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, case, or_, func, exists, literal
 
-from podcast.adapters.orm import podcast_table, authors_table, categories_table, podcast_categories_table
-from podcast.adapters.repository import AbstractRepository
+from podcast.adapters.orm import podcast_table, authors_table, categories_table, podcast_categories_table, \
+    episode_table, users_table, playlist_table, playlist_episodes_table, playlist_podcasts_table, reviews_table
+from podcast.adapters.trending import trending_key
+from podcast.adapters.repository import AbstractRepository, format_average_rating, build_catalogue_sidebar, Page, \
+    page_offset, PodcastDetails
 from podcast.domainmodel.model import Podcast, Author, Category, Episode, Playlist, User, Review
 
 
+# Statements shared by SqlAlchemyRepository and AsyncSqlAlchemyRepository.
+
+def podcasts_query():
+    # Podcasts with their author joined in and their categories fetched in one extra SELECT for the whole
+    # result, rather than one lazy load per podcast.
+    return select(Podcast).options(joinedload(Podcast._author), selectinload(Podcast.categories))
+
+
+def podcast_details_query(podcast_id: int):
+    # One query for the podcast and its author, one for its categories and one for its reviews and their users.
+    return (select(Podcast).where(podcast_table.c.podcast_id == podcast_id)
+            .options(joinedload(Podcast._author),
+                     selectinload(Podcast.categories),
+                     selectinload(Podcast._Podcast__reviews).joinedload(Review._Review__user)))
+
+
+def episodes_page_queries(podcast_id: int, page: int, per_page: int):
+    """The query for one page of a podcast's episodes, each row carrying the podcast's episode count, and the
+    count query to fall back on when the page is empty."""
+    criterion = episode_table.c.podcast_id == podcast_id
+    # ix_episodes_podcast_id already holds each podcast's episode ids in order.
+    page_stmt = (select(Episode, func.count().over().label('total')).where(criterion)
+                 .order_by(episode_table.c.episode_id).limit(per_page).offset(page_offset(page, per_page)))
+    return page_stmt, select(func.count()).select_from(episode_table).where(criterion)
+
+
+def _user_reviews_criterion(username: str):
+    # ix_users_username_lower finds the user, ix_reviews_user_id their reviews.
+    return reviews_table.c.user_id.in_(
+        select(users_table.c.user_id).where(func.lower(users_table.c.username) == username.lower()))
+
+
+def _podcast_ids_in_categories(*criteria):
+    return (select(podcast_categories_table.c.podcast_id)
+            .join(categories_table, categories_table.c.category_id == podcast_categories_table.c.category_id)
+            .where(*criteria))
+
+
+def query_match(query: str):
+    pattern = f"%{query.strip().lower()}%"
+    title_match = podcast_table.c.title.ilike(pattern)
+    author_match = podcast_table.c.author_id.in_(
+        select(authors_table.c.author_id).where(authors_table.c.name.ilike(pattern)))
+    category_match = podcast_table.c.podcast_id.in_(
+        _podcast_ids_in_categories(categories_table.c.category_name.ilike(pattern)))
+    # Title matches first, then author matches, then category matches, as separate searches used to return.
+    rank = case((title_match, 0), (author_match, 1), else_=2)
+    return or_(title_match, author_match, category_match), rank
+
+
+def podcasts_page_queries(page, per_page, search_title=None, category_id=None, author_id=None, title_id=None):
+    """The count query and the page query for one page of the catalogue, filtered like the catalogue page."""
+    criteria, order_by = [], []
+    if search_title:
+        criterion, rank = query_match(search_title)
+        criteria.append(criterion)
+        order_by.append(rank)
+    elif title_id:
+        criteria.append(podcast_table.c.podcast_id == int(title_id))
+    elif category_id:
+        criteria.append(podcast_table.c.podcast_id.in_(select(podcast_categories_table.c.podcast_id).where(
+            podcast_categories_table.c.category_id == int(category_id))))
+    elif author_id:
+        criteria.append(podcast_table.c.author_id == int(author_id))
+
+    count_stmt = select(func.count()).select_from(podcast_table).where(*criteria)
+    # ORDER BY title walks ix_podcasts_title; the id breaks ties so pages never overlap.
+    page_stmt = (podcasts_query().where(*criteria).order_by(*order_by, Podcast._title, Podcast._id)
+                 .limit(per_page).offset(page_offset(page, per_page)))
+    return count_stmt, page_stmt
+
+
 class SessionContextManager:
     def __init__(self, session_factory):
         self.__session_factory = session_factory
@@ -41,126 +118,130 @@ class SessionContextManager:
 
 
 class SqlAlchemyRepository(AbstractRepository, ABC):
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, executor=None, clock=time.time):
         self._session_cm = SessionContextManager(session_factory)
         self.csv_reader = None
-        self.podcasts = []
-        self.episodes = {}
-        self.authors = {}
-        self.categories = {}
-        self.categories_list = []
+        # when set (a concurrent.futures executor), independent queries of one call run side by side on it
+        self.executor = executor
 
         self.recently_added_episode = -1
         self.recently_added_podcast = -1
+        # bumped by load_data, the only way this repository changes the catalogue
+        self._catalogue_version = 0
+        self._catalogue_sidebar = None
+        # trending activity is timestamped with this; it is stored in the podcasts table, shared by every process
+        self._clock = clock
 
     def close_session(self):
         self._session_cm.close_current_session()
 
+    def _fan_out(self, *calls):
+        """Runs calls side by side and returns their results in order. The first runs on the calling thread; the
+        others run on self.executor, each in its worker thread's own scoped session, which is closed again as
+        soon as the call returns. Without an executor the calls simply run one after another."""
+        if self.executor is None:
+            return [call() for call in calls]
+        # each task runs in a copy of the caller's context, so per-request state such as flask.g is still there
+        futures = [self.executor.submit(contextvars.copy_context().run, self._in_worker_session, call)
+                   for call in calls[1:]]
+        first = calls[0]()
+        return [first] + [future.result() for future in futures]
+
+    def _in_worker_session(self, call):
+        try:
+            return call()
+        finally:
+            self._session_cm.close_current_session()
+
     def reset_session(self):
         self._session_cm.reset_session()
 
     def load_data(self, csvreader):
+        """Bulk-loads the csv catalogue with one executemany INSERT per table, all inside a single transaction."""
         self.csv_reader = csvreader
-        episodes_dict = self.csv_reader.get_episodes()
-        self.load_categories()
-        with self._session_cm as scm:
-            scm.session.add_all(self.categories_list)
-            scm.commit()
-        categories = self.get_categories()
-        self.load_authors()
-        self.load_podcasts(categories)
-        for podcast in self.podcasts:
-            self.hydrate_podcast(episodes_dict, podcast)
+        authors, categories, podcasts, podcast_categories = self._catalogue_rows()
+        podcast_ids = {row['podcast_id'] for row in podcasts}
+        episodes = self._episode_rows(podcast_ids)
+
         with self._session_cm as scm:
-            scm.session.add_all(self.podcasts)
+            for table, rows in ((authors_table, authors),
+                                (categories_table, categories),
+                                (podcast_table, podcasts),
+                                (podcast_categories_table, podcast_categories),
+                                (episode_table, episodes)):
+                if rows:
+                    scm.session.execute(insert(table), rows)
             scm.commit()
-
-    def hydrate_podcast(self, episodes_dict, podcast):
-        for item in episodes_dict:
-            if int(item["podcast_id"]) == podcast.id:
-                episode = self._create_episode(item, podcast)
-                podcast.episodes.append(episode)
-
-    def load_podcasts(self, categories):
-        podcasts_data = self.csv_reader.get_podcasts()
-        for row in podcasts_data:
-            podcast = self._create_podcast(row, categories)
-            self.podcasts.append(podcast)
-
-    def load_categories(self):
-        podcasts_data = self.csv_reader.get_podcasts()
-        unique_categories = {}
-        for row in podcasts_data:
-            category_names = row.get('categories', "").split('|')
-            for name in category_names:
-                normalized_name = name.strip().lower()
-                if normalized_name not in unique_categories:
-                    unique_categories[normalized_name] = Category(
-                        category_id=len(unique_categories) + 1,
-                        name=normalized_name.capitalize()
-                    )
-                    self.categories_list.append(unique_categories[normalized_name])
-        self.categories = unique_categories
-
-    def load_authors(self):
-        podcasts_data = self.csv_reader.get_podcasts()
-        unique_authors = {}
-        for row in podcasts_data:
-            author_name = row.get('author', "").strip()
-            if author_name and author_name not in unique_authors:
-                author_id = len(unique_authors) + 1
-                unique_authors[author_name] = Author(
-                    author_id=author_id,
-                    name=author_name
-                )
-        self.authors = unique_authors
-
-    def _create_podcast(self, data, categories):
-        author_name = data.get('author', "").strip()
-        author = self.authors.get(author_name)
-
-        if not author:
-            author = Author(author_id=len(self.authors) + 1, name=author_name)
-            self.authors[author_name] = author
-
-        podcast = Podcast(
-            podcast_id=int(data.get('id', 0)),
-            title=data.get('title', "Untitled"),
-            image=data.get('image', None),
-            author=author,
-            description=data.get('description', ""),
-            language=data.get('language', "Unspecified"),
-            website=data.get('website', ""),
-            itunes_id=data.get('itunes_id', None)
-        )
-
-        author.add_podcast(podcast)
-
-        category_names = data.get('categories', "").split('|')
-        for name in category_names:
-            name = name.strip()
-            for category in categories:
-                if name.lower() == category.name.lower():
-                    podcast.add_category(category)
-
-        return podcast
-
-    def _create_episode(self, data, podcast=None):
-        episode = Episode(
-            episode_id=int(data.get('id', 0)),
-            podcast=podcast,
-            title=data.get('title', "Unknown"),
-            audio_length=int(data.get('audio_length', 0)),
-            publication_date=data.get('pub_date', 'Unknown'),
-            description=data.get('description', 'Unknown'),
-            audio_link=data.get('audio', 'Unknown')
-        )
-        return episode
+        self._catalogue_version += 1
+        self._catalogue_sidebar = None
+
+    def _catalogue_rows(self):
+        author_ids = {}
+        category_ids = {}
+        authors, categories, podcasts, podcast_categories = [], [], [], []
+
+        for row in self.csv_reader.iter_podcasts():
+            author_id = None
+            author_name = row['author']
+            if author_name:
+                author_id = author_ids.get(author_name)
+                if author_id is None:
+                    author_id = author_ids[author_name] = len(author_ids) + 1
+                    authors.append({'author_id': author_id, 'name': author_name})
+
+            podcast_id = row['id']
+            podcasts.append({
+                'podcast_id': podcast_id,
+                'title': (row.get('title') or "Untitled").strip(),
+                'image_url': row.get('image'),
+                'description': row.get('description', ""),
+                'language': row.get('language', "Unspecified"),
+                'website_url': row.get('website', ""),
+                'author_id': author_id,
+                'itunes_id': row['itunes_id'],
+            })
+
+            podcast_category_ids = []
+            for name in row['categories']:
+                normalized_name = name.lower()
+                category_id = category_ids.get(normalized_name)
+                if category_id is None:
+                    category_id = category_ids[normalized_name] = len(category_ids) + 1
+                    categories.append({'category_id': category_id, 'category_name': normalized_name.capitalize()})
+                if category_id not in podcast_category_ids:
+                    podcast_category_ids.append(category_id)
+            podcast_categories.extend({'podcast_id': podcast_id, 'category_id': category_id}
+                                      for category_id in podcast_category_ids)
+
+        return authors, categories, podcasts, podcast_categories
+
+    def _episode_rows(self, podcast_ids):
+        # Episodes are matched to their podcast by id as they stream past, in a single pass over the file.
+        return [{
+            'episode_id': row['id'],
+            'podcast_id': row['podcast_id'],
+            'title': row.get('title', "Unknown"),
+            'audio_length': row['audio_length'],
+            'publication_date': row.get('pub_date', 'Unknown')[0:10],
+            'description': row.get('description', 'Unknown'),
+            'audio_link': row.get('audio', 'Unknown'),
+        } for row in self.csv_reader.iter_episodes() if row['podcast_id'] in podcast_ids]
 
     def get_podcasts(self, sorting: bool = False) -> List[Podcast]:
-        podcasts = self._session_cm.session.query(Podcast).all()
-        sorted_podcasts = sorted(podcasts, key=lambda podcast: podcast.title)
-        return sorted_podcasts
+        return self._podcasts_where()
+
+    def get_catalogue_sidebar(self):
+        sidebar = self._catalogue_sidebar
+        if sidebar is None or sidebar.version != self._catalogue_version:
+            # Plain column selects: nothing is loaded into the session for the dropdowns.
+            session = self._session_cm.session
+            sidebar = self._catalogue_sidebar = build_catalogue_sidebar(
+                self._catalogue_version,
+                session.execute(select(categories_table.c.category_id, categories_table.c.category_name)).all(),
+                session.execute(select(authors_table.c.author_id, authors_table.c.name)).all(),
+                session.execute(select(podcast_table.c.podcast_id, podcast_table.c.title)).all(),
+            )
+        return sidebar
 
     def get_podcast(self, podcast_id: int) -> Podcast:
         podcast = None
@@ -179,6 +260,32 @@ class SqlAlchemyRepository(AbstractRepository, ABC):
             query = scm.session.query(Episode).filter(Episode.podcast_id == podcast_id).all()
             return query
 
+    def get_episodes_page_by_podcast_id(self, podcast_id: int, page: int, per_page: int) -> Page:
+        return self._windowed_page(*episodes_page_queries(podcast_id, page, per_page), page, per_page)
+
+    def _windowed_page(self, page_stmt, count_stmt, page, per_page) -> Page:
+        # The total rides along on every row as a window count, so a page normally costs a single query.
+        session = self._session_cm.session
+        rows = session.execute(page_stmt).all()
+        total = rows[0].total if rows else session.scalar(count_stmt)
+        return Page([row[0] for row in rows], total, max(page, 1), per_page)
+
+    def get_podcast_details(self, podcast_id: int, episode_page: int, per_page: int):
+        # Three queries for the podcast (see podcast_details_query) and, alongside them, one for the page of
+        # episodes. The episodes come back detached from their worker's session, with every column loaded.
+        podcast, episodes = self._fan_out(
+            lambda: self._session_cm.session.scalars(podcast_details_query(podcast_id)).unique().first(),
+            lambda: self.get_episodes_page_by_podcast_id(podcast_id, episode_page, per_page),
+        )
+        if podcast is None:
+            return None
+        return PodcastDetails(
+            podcast=podcast,
+            episodes=episodes,
+            reviews=list(podcast.reviews),
+            average_rating=format_average_rating(podcast._review_count, podcast._rating_total),
+        )
+
     def add_user(self, user):
         with self._session_cm as scm:
             scm.session.add(user)
@@ -192,7 +299,7 @@ class SqlAlchemyRepository(AbstractRepository, ABC):
         user = None
         try:
             query = self._session_cm.session.query(User).filter(
-                User._username == username.lower())
+                func.lower(users_table.c.username) == username.lower())
             user = query.one()
         except NoResultFound:
             print(f'User {username} was not found')
@@ -200,8 +307,13 @@ class SqlAlchemyRepository(AbstractRepository, ABC):
         return user
 
     def add_review(self, review):
+        podcast_id = review.podcast.id
         with self._session_cm as scm:
             scm.session.merge(review)
+            # Inserting the review adds it to the podcast's review_count and rating_total in this same
+            # transaction (see orm.count_review).
+            scm.session.flush()
+            self._record_activity(scm.session, podcast_id, 'review')
             scm.commit()
 
     def get_all_reviews(self, sorting: bool = False) -> list[type[Review]]:
@@ -209,12 +321,17 @@ class SqlAlchemyRepository(AbstractRepository, ABC):
         return reviews
 
     def get_user_reviews(self, username):
-        reviewlist = []
-        all_reviews = self.get_all_reviews()
-        for review in all_reviews:
-            if review.user.username.lower() == username.lower():
-                reviewlist.append(review)
-        return reviewlist
+        stmt = select(Review).where(_user_reviews_criterion(username)).order_by(reviews_table.c.review_id)
+        return list(self._session_cm.session.scalars(stmt))
+
+    def get_user_reviews_page(self, username, page, per_page):
+        criterion = _user_reviews_criterion(username)
+        # ix_reviews_user_id keeps each user's reviews in id order, which is the order they were written in.
+        page_stmt = (select(Review, func.count().over().label('total')).where(criterion)
+                     .options(joinedload(Review._Review__podcast))
+                     .order_by(reviews_table.c.review_id).limit(per_page).offset(page_offset(page, per_page)))
+        count_stmt = select(func.count()).select_from(reviews_table).where(criterion)
+        return self._windowed_page(page_stmt, count_stmt, page, per_page)
 
 
     def get_authors(self) -> List[Author]:
@@ -245,95 +362,78 @@ class SqlAlchemyRepository(AbstractRepository, ABC):
             scm.session.merge(episode)
             scm.commit()
 
+    def _podcasts_where(self, *criteria, order_by=()) -> List[Podcast]:
+        stmt = podcasts_query().where(*criteria).order_by(*order_by, Podcast._title, Podcast._id)
+        return list(self._session_cm.session.scalars(stmt).unique().all())
+
     def search_podcast_by_title(self, title_string: str) -> List[Podcast]:
         title_string = title_string.strip().lower()
-        stmt = select(podcast_table).where(podcast_table.c.title.ilike(f"%{title_string}%"))
-        result = self._session_cm.session.execute(stmt).scalars().all()
-        filtered = []
-        for id in result:
-            podcast = self.get_podcast(id)
-            if podcast is not None:
-                filtered.append(podcast)
-        return filtered if filtered else []
+        return self._podcasts_where(podcast_table.c.title.ilike(f"%{title_string}%"))
 
     def search_podcast_by_author(self, author_name: str) -> List[Podcast]:
-        filtered = []
         author_name = author_name.strip().lower()
-        stmt = select(authors_table).where(authors_table.c.name.ilike(f"%{author_name}%"))
-        author_ids = self._session_cm.session.execute(stmt).scalars().all()
-        for author_id in author_ids:
-            stmt = select(podcast_table).where(podcast_table.c.author_id == author_id)
-            results = self._session_cm.session.execute(stmt).scalars().all()
-            for podcast_id in results:
-                podcast = self.get_podcast(podcast_id)
-                if podcast is not None:
-                    filtered.append(podcast)
-
-        return filtered if filtered else []
+        author_ids = select(authors_table.c.author_id).where(authors_table.c.name.ilike(f"%{author_name}%"))
+        return self._podcasts_where(podcast_table.c.author_id.in_(author_ids))
 
     def search_podcast_by_author_id(self, author_id: str) -> List[Podcast]:
-        filtered = []
-        author_id = author_id.strip().lower()
-        stmt = select(podcast_table).where(podcast_table.c.author_id == author_id)
-        podcast_ids = self._session_cm.session.execute(stmt).scalars().all()
-        for podcast_id in podcast_ids:
-            podcast = self.get_podcast(podcast_id)
-            if podcast is not None:
-                filtered.append(podcast)
-        return filtered if filtered else []
+        author_id = str(author_id).strip()
+        return self._podcasts_where(podcast_table.c.author_id == author_id)
 
     def search_podcast_by_category(self, category_string: str) -> List[Podcast]:
         category_string = category_string.strip().lower()
-        stmt = select(categories_table).where(categories_table.c.category_name.ilike(f"%{category_string}%"))
-        results = self._session_cm.session.execute(stmt).scalars().all()
-        filtered = []
-        for category_id in results:
-            stmt = select(podcast_categories_table.c.podcast_id).where(podcast_categories_table.c.category_id == category_id)
-            results = self._session_cm.session.execute(stmt).scalars().all()
-            for podcast_id in results:
-                podcast = self.get_podcast(podcast_id)
-                if podcast is not None:
-                    filtered.append(podcast)
-
-        return filtered
+        podcast_ids = _podcast_ids_in_categories(categories_table.c.category_name.ilike(f"%{category_string}%"))
+        return self._podcasts_where(podcast_table.c.podcast_id.in_(podcast_ids))
 
     def search_podcast_by_category_id(self, category_id: str) -> List[Podcast]:
-        category_id = category_id.strip().lower()
-        filtered = []
-        stmt = select(podcast_categories_table.c.podcast_id).where(podcast_categories_table.c.category_id == category_id)
-        results = self._session_cm.session.execute(stmt).scalars().all()
-        for podcast_id in results:
-            podcast = self.get_podcast(podcast_id)
-            if podcast is not None:
-                filtered.append(podcast)
-
-        return filtered
+        category_id = str(category_id).strip()
+        podcast_ids = select(podcast_categories_table.c.podcast_id).where(
+            podcast_categories_table.c.category_id == category_id)
+        return self._podcasts_where(podcast_table.c.podcast_id.in_(podcast_ids))
 
     def search_podcasts_by_query(self, query: str) -> List[Podcast]:
-        filtered = []
-        titles = self.search_podcast_by_title(query)
-        for podcast in titles:
-            filtered.append(podcast)
-        authors = self.search_podcast_by_author(query)
-        for podcast in authors:
-            if podcast not in filtered:
-                filtered.append(podcast)
-        authors = self.search_podcast_by_category(query)
-        for podcast in authors:
-            if podcast not in filtered:
-                filtered.append(podcast)
-        return filtered
+        criterion, rank = query_match(query)
+        return self._podcasts_where(criterion, order_by=(rank,))
+
+    def _record_activity(self, session, podcast_id, event):
+        # Runs in the transaction that writes the review or playlist entry, after that write, so the database
+        # already holds the write lock and no concurrent event on the same podcast can be lost.
+        now = self._clock()
+        key = session.scalar(select(podcast_table.c.trending_key).where(podcast_table.c.podcast_id == podcast_id))
+        session.execute(
+            update(podcast_table).where(podcast_table.c.podcast_id == podcast_id)
+            .values(trending_key=trending_key(key, event, now), trending_updated=now))
+
+    def get_charts_version(self):
+        # ix_podcasts_trending_updated answers this from the end of the index, and every process sees the same value
+        last_activity = self._session_cm.session.scalar(select(func.max(podcast_table.c.trending_updated)))
+        return self._catalogue_version, last_activity
+
+    def get_trending_podcasts(self, n: int) -> List[Podcast]:
+        podcast_ids = list(self._session_cm.session.scalars(
+            select(podcast_table.c.podcast_id).where(podcast_table.c.trending_key.is_not(None))
+            .order_by(podcast_table.c.trending_key.desc()).limit(n)))
+        if not podcast_ids:
+            return []
+        podcasts = {podcast.id: podcast
+                    for podcast in self._podcasts_where(podcast_table.c.podcast_id.in_(podcast_ids))}
+        return [podcasts[podcast_id] for podcast_id in podcast_ids if podcast_id in podcasts]
+
+    def get_podcasts_page(self, page, per_page, search_title=None, category_id=None, author_id=None, title_id=None):
+        count_stmt, page_stmt = podcasts_page_queries(page, per_page, search_title=search_title,
+                                                      category_id=category_id, author_id=author_id,
+                                                      title_id=title_id)
+        session = self._session_cm.session
+        total = session.scalar(count_stmt)
+        return Page(list(session.scalars(page_stmt).unique()), total, max(page, 1), per_page)
 
     def search_podcast_by_language(self, language_string: str) -> List[Podcast]:
         pass
 
     def create_playlist(self, user: User):
-        user_found = False
-        all_playlists = self.get_all_playlists()
-        for playlist in all_playlists:
-            if playlist.user == user:
-                user_found = True
-        if not user_found:
+        # ix_playlists_user_id answers this without touching any other user's playlist
+        has_playlist = self._session_cm.session.scalar(
+            select(playlist_table.c.id).where(playlist_table.c.user_id == user.id).limit(1))
+        if has_playlist is None:
             new_playlist = Playlist(None, user, user.username + "'s Playlist",
                                     "Save episodes and whole playlists to watch later!", [], [])
             with self._session_cm as scm:
@@ -345,39 +445,105 @@ class SqlAlchemyRepository(AbstractRepository, ABC):
         return all_playlists
 
     def get_playlist(self, user: User):
-        all_playlists = self.get_all_playlists()
-        for playlist in all_playlists:
-            if playlist.user == user:
-                return playlist
-        raise ValueError("User does not have playlist.")
-
-    def add_episode_to_playlist(self, new_episode: Episode, user: User):
-        playlist = self.get_playlist(user)
-        playlist.add_episode(new_episode)
+        # One indexed lookup by user id, then one query each for the playlist's episodes and podcasts.
+        return self._user_playlist(user, selectinload(Playlist._episodes), selectinload(Playlist._podcasts))
+
+    def get_playlist_summary(self, user: User):
+        # The same lookup without the members, so a caller that only pages through them (see
+        # get_playlist_episodes_page) never loads the whole playlist.
+        return self._user_playlist(user)
+
+    def _user_playlist(self, user: User, *options):
+        stmt = select(Playlist).where(playlist_table.c.user_id == user.id).options(*options)
+        playlist = self._session_cm.session.scalars(stmt).first()
+        if playlist is None:
+            raise ValueError("User does not have playlist.")
+        return playlist
+
+    def _playlist_id(self, user: User) -> int:
+        playlist_id = self._session_cm.session.scalar(
+            select(playlist_table.c.id).where(playlist_table.c.user_id == user.id).limit(1))
+        if playlist_id is None:
+            raise ValueError("User does not have playlist.")
+        return playlist_id
+
+    def get_playlist_episodes_page(self, user: User, page, per_page):
+        return self._playlist_page(Episode, playlist_episodes_table, episode_table.c.episode_id,
+                                   playlist_episodes_table.c.episode_id, user, page, per_page)
+
+    def get_playlist_podcasts_page(self, user: User, page, per_page):
+        return self._playlist_page(Podcast, playlist_podcasts_table, podcast_table.c.podcast_id,
+                                   playlist_podcasts_table.c.podcast_id, user, page, per_page)
+
+    def _playlist_page(self, entity, table, id_column, member_column, user, page, per_page) -> Page:
+        criterion = table.c.playlist_id == self._playlist_id(user)
+        # The (playlist_id, position) index hands back a playlist's members in the order they were added.
+        page_stmt = (select(entity, func.count().over().label('total'))
+                     .join(table, member_column == id_column).where(criterion)
+                     .order_by(table.c.position, member_column).limit(per_page).offset(page_offset(page, per_page)))
+        count_stmt = select(func.count()).select_from(table).where(criterion)
+        return self._windowed_page(page_stmt, count_stmt, page, per_page)
+
+    # Playlist edits write the one association row they change rather than merging the whole playlist, so they
+    # cost the same however long the playlist is. Committing expires any playlist the session already holds,
+    # so it is reloaded with the change the next time it is read.
+
+    def _add_to_playlist(self, table, member_column, playlist_id, member_id, podcast_id, event):
+        # INSERT ... SELECT ... WHERE NOT EXISTS, so adding a member twice keeps a single row (the unique
+        # (playlist_id, member) index backs this up). The new member goes after the playlist's last one.
+        next_position = (select(func.coalesce(func.max(table.c.position), 0) + 1)
+                         .where(table.c.playlist_id == playlist_id).scalar_subquery())
+        already_added = exists().where(table.c.playlist_id == playlist_id, member_column == member_id)
+        new_row = select(literal(playlist_id), literal(member_id), next_position).where(~already_added)
         with self._session_cm as scm:
-            scm.session.merge(playlist)
+            result = scm.session.execute(
+                insert(table).from_select(['playlist_id', member_column.name, 'position'], new_row))
+            # only a member that was actually added counts towards trending, not a repeated click on "add"
+            if result.rowcount and podcast_id is not None:
+                self._record_activity(scm.session, podcast_id, event)
             scm.commit()
+        return result.rowcount
 
-    def add_podcast_to_playlist(self, new_podcast: Podcast, user: User):
-        playlist = self.get_playlist(user)
-        playlist.add_podcast(new_podcast)
+    def _delete_from_playlist(self, table, member_column, playlist_id, member_id) -> bool:
         with self._session_cm as scm:
-            scm.session.merge(playlist)
+            result = scm.session.execute(
+                delete(table).where(table.c.playlist_id == playlist_id, member_column == member_id))
+            if result.rowcount == 0:
+                return False
             scm.commit()
+        return True
+
+    def add_episode_to_playlist(self, new_episode: Episode, user: User):
+        playlist_id = self._playlist_id(user)
+        if not isinstance(new_episode, Episode):
+            raise TypeError("Episode must be a Episode object.")
+        podcast_id = new_episode.podcast.id if new_episode.podcast is not None else None
+        self._add_to_playlist(playlist_episodes_table, playlist_episodes_table.c.episode_id, playlist_id,
+                              new_episode.id, podcast_id, 'playlist_episode')
+
+    def add_podcast_to_playlist(self, new_podcast: Podcast, user: User):
+        playlist_id = self._playlist_id(user)
+        if not isinstance(new_podcast, Podcast):
+            raise TypeError("Podcast must be a Podcast object.")
+        podcast_id = new_podcast.id
+        self._add_to_playlist(playlist_podcasts_table, playlist_podcasts_table.c.podcast_id, playlist_id, podcast_id,
+                              podcast_id, 'playlist_podcast')
 
     def delete_episode_from_playlist(self, del_episode: Episode, user: User):
-        playlist = self.get_playlist(user)
-        playlist.delete_episode(del_episode)
-        with self._session_cm as scm:
-            scm.session.merge(playlist)
-            scm.commit()
+        playlist_id = self._playlist_id(user)
+        if not isinstance(del_episode, Episode):
+            raise TypeError("Episode must be a Episode object.")
+        if not self._delete_from_playlist(playlist_episodes_table, playlist_episodes_table.c.episode_id,
+                                          playlist_id, del_episode.id):
+            raise ValueError("Episode not in Playlist.")
 
     def delete_podcast_from_playlist(self, del_podcast: Podcast, user: User):
-        playlist = self.get_playlist(user)
-        playlist.delete_podcast(del_podcast)
-        with self._session_cm as scm:
-            scm.session.merge(playlist)
-            scm.commit()
+        playlist_id = self._playlist_id(user)
+        if not isinstance(del_podcast, Podcast):
+            raise TypeError("Podcast must be a Podcast object.")
+        if not self._delete_from_playlist(playlist_podcasts_table, playlist_podcasts_table.c.podcast_id,
+                                          playlist_id, del_podcast.id):
+            raise ValueError("Podcast not in Playlist.")
 
     def recently_added_episode_to_playlist(self, episode_id):
         self.recently_added_episode = episode_id
@@ -396,10 +562,8 @@ class SqlAlchemyRepository(AbstractRepository, ABC):
         return podcast.reviews
 
     def get_average_rating(self, podcast_id: int):
-        review_list = self.get_reviews_by_podcast(podcast_id)
-        if len(review_list) == 0:
-            return 'No ratings yet!'
-        total_sum = 0
-        for review in review_list:
-            total_sum += review.rating
-        return '{0:.1f}'.format(total_sum / len(review_list))
\ No newline at end of file
+        # Served from the podcast's review aggregates; session.get() reuses the podcast the page already loaded.
+        podcast = self._session_cm.session.get(Podcast, podcast_id)
+        if podcast is None:
+            return format_average_rating(0, 0)
+        return format_average_rating(podcast._review_count, podcast._rating_total)
@@ -1,6 +1,17 @@
 import csv
 
 
+def _to_int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def split_categories(value: str) -> list[str]:
+    return [name.strip() for name in value.split('|') if name.strip()]
+
+
 class CSVDataReader:
     def __init__(self, podcasts_file, episodes_file):
         self.podcasts_file = podcasts_file
@@ -17,3 +28,22 @@ class CSVDataReader:
             reader = csv.DictReader(file)
             episodes_data = [row for row in reader]
         return episodes_data
+
+    def iter_podcasts(self):
+        """Yields one podcast row at a time with its ids parsed and its categories split into a list."""
+        with open(self.podcasts_file, 'r') as file:
+            for row in csv.DictReader(file):
+                row['id'] = _to_int(row.get('id'), 0)
+                row['itunes_id'] = _to_int(row.get('itunes_id'))
+                row['author'] = (row.get('author') or "").strip()
+                row['categories'] = split_categories(row.get('categories') or "")
+                yield row
+
+    def iter_episodes(self):
+        """Yields one episode row at a time with its ids and audio length parsed."""
+        with open(self.episodes_file, 'r') as file:
+            for row in csv.DictReader(file):
+                row['id'] = _to_int(row.get('id'), 0)
+                row['podcast_id'] = _to_int(row.get('podcast_id'), 0)
+                row['audio_length'] = _to_int(row.get('audio_length'), 0)
+                yield row
@@ -1,7 +1,9 @@
 from sqlalchemy import (
-    Table, Column, Integer, Float, String, DateTime, ForeignKey, Text, MetaData
+    Table, Column, Integer, Float, String, DateTime, ForeignKey, Text, MetaData, Index, func, inspect, select, event
 )
 from sqlalchemy.orm import registry, relationship
+from sqlalchemy.orm.collections import attribute_keyed_dict
+from sqlalchemy.schema import CreateIndex
 from datetime import datetime
 
 from podcast.domainmodel.model import Podcast, Author, Category, User, Review, Episode, Playlist
@@ -27,7 +29,18 @@ podcast_table = Table(
     Column('language', String(255), nullable=True),
     Column('website_url', String(255), nullable=True),
     Column('author_id', ForeignKey('authors.author_id')),
-    Column('itunes_id', Integer, nullable=True)
+    Column('itunes_id', Integer, nullable=True),
+    # running review aggregates, kept up to date by SqlAlchemyRepository.add_review
+    Column('review_count', Integer, nullable=False, default=0, server_default='0'),
+    Column('rating_total', Integer, nullable=False, default=0, server_default='0'),
+    # trending activity (see podcast.adapters.trending.trending_key) and when it was last added to, kept up to
+    # date by SqlAlchemyRepository in the transaction that writes the review or playlist entry
+    Column('trending_key', Float, nullable=True),
+    Column('trending_updated', Float, nullable=True),
+    Index('ix_podcasts_author_id', 'author_id'),
+    Index('ix_podcasts_trending_key', 'trending_key'),
+    Index('ix_podcasts_trending_updated', 'trending_updated'),
+    Index('ix_podcasts_title', 'title'),
 )
 
 # Episodes should have links to its podcast through its foreign keys
@@ -39,7 +52,8 @@ episode_table = Table(
     Column('audio_length', Integer, nullable=True),
     Column('publication_date', String(255), nullable=True),
     Column('description', String(255), nullable=True),
-    Column('audio_link', String(255), nullable=True)
+    Column('audio_link', String(255), nullable=True),
+    Index('ix_episodes_podcast_id', 'podcast_id'),
 )
 
 categories_table = Table(
@@ -52,6 +66,7 @@ podcast_categories_table = Table(
     'podcast_categories',  mapper_registry.metadata,
     Column('podcast_id', Integer, ForeignKey('podcasts.podcast_id'), primary_key=True),
     Column('category_id', Integer, ForeignKey('categories.category_id'), primary_key=True),
+    Index('ix_podcast_categories_category_id', 'category_id'),
 )
 
 reviews_table = Table(
@@ -61,6 +76,8 @@ reviews_table = Table(
     Column('podcast_id', ForeignKey('podcasts.podcast_id')),
     Column('comment', String(255), nullable=True),
     Column('rating', Integer, nullable=False),
+    Index('ix_reviews_podcast_id', 'podcast_id'),
+    Index('ix_reviews_user_id', 'user_id'),
 )
 
 users_table = Table(
@@ -68,7 +85,6 @@ users_table = Table(
     Column('user_id', Integer, primary_key=True, autoincrement=True),
     Column('username', String(20),unique=True, nullable=False),
     Column('password', String(20), nullable=False),
-
 )
 
 playlist_table = Table(
@@ -77,20 +93,151 @@ playlist_table = Table(
     Column('user_id', Integer, ForeignKey('users.user_id')),
     Column('title', String(31), nullable=False),  # 11 characters more than username, "[username]'s playlist"
     Column('description', String(255), nullable=True),
+    Index('ix_playlists_user_id', 'user_id'),
 )
 
 playlist_episodes_table = Table(
     'playlist_episodes',  mapper_registry.metadata,
     Column('playlist_id', Integer, ForeignKey('playlists.id')),
     Column('episode_id', Integer, ForeignKey('episodes.episode_id')),
+    # the member's place in its playlist, in the order members were added (see SqlAlchemyRepository)
+    Column('position', Integer, nullable=True),
+    # one row per member: adding an episode that is already there is ignored
+    Index('ix_playlist_episodes_playlist_episode', 'playlist_id', 'episode_id', unique=True),
+    Index('ix_playlist_episodes_playlist_position', 'playlist_id', 'position'),
+    Index('ix_playlist_episodes_episode_id', 'episode_id'),
 )
 
 playlist_podcasts_table = Table(
     'playlist_podcasts', mapper_registry.metadata,
     Column('playlist_id', Integer, ForeignKey('playlists.id')),
     Column('podcast_id', Integer, ForeignKey('podcasts.podcast_id')),
+    Column('position', Integer, nullable=True),
+    Index('ix_playlist_podcasts_playlist_podcast', 'playlist_id', 'podcast_id', unique=True),
+    Index('ix_playlist_podcasts_playlist_position', 'playlist_id', 'position'),
+    Index('ix_playlist_podcasts_podcast_id', 'podcast_id'),
 )
 
+# each playlist association table with the name of its member column
+PLAYLIST_MEMBER_COLUMNS = ((playlist_episodes_table, 'episode_id'), (playlist_podcasts_table, 'podcast_id'))
+
+# Case-insensitive username lookups (get_user matches on lower(username))
+Index('ix_users_username_lower', func.lower(users_table.c.username))
+
+# Indexes older databases were given that are no longer declared. Title and author name searches match
+# substrings (ILIKE '%...%'), which a lower() index cannot answer, so those only slowed down writes; the
+# non-unique playlist member indexes were replaced by the unique ones above.
+DROPPED_INDEXES = ('ix_podcasts_title_lower', 'ix_authors_name_lower',
+                   'ix_playlist_episodes_playlist_id', 'ix_playlist_podcasts_playlist_id')
+
+
+def review_aggregate_values():
+    # review_count and rating_total recomputed from the reviews table, for backfilling older databases
+    reviews = reviews_table.alias()
+    return {
+        'review_count': select(func.count()).where(reviews.c.podcast_id == podcast_table.c.podcast_id)
+        .scalar_subquery(),
+        'rating_total': select(func.coalesce(func.sum(reviews.c.rating), 0))
+        .where(reviews.c.podcast_id == podcast_table.c.podcast_id).scalar_subquery(),
+    }
+
+
+def count_review(mapper, connection, review):
+    # Runs as each review row is inserted, in the flush's transaction. Counting inserts (rather than calls to
+    # add_review) counts a review exactly once, whether add_review or an earlier autoflush wrote it, and a
+    # review merged again is never re-inserted.
+    if review.podcast is None:
+        return
+    connection.execute(
+        podcast_table.update()
+        .where(podcast_table.c.podcast_id == review.podcast.id)
+        .values(review_count=podcast_table.c.review_count + 1,
+                rating_total=podcast_table.c.rating_total + review.rating))
+
+
+def add_review_aggregates(engine):
+    # Databases created before podcasts carried review aggregates get the columns added and backfilled.
+    with engine.begin() as connection:
+        columns = {column['name'] for column in inspect(connection).get_columns('podcasts')}
+        if 'review_count' in columns and 'rating_total' in columns:
+            return
+        for name in ('review_count', 'rating_total'):
+            if name not in columns:
+                connection.exec_driver_sql(f'ALTER TABLE podcasts ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0')
+        connection.execute(podcast_table.update().values(**review_aggregate_values()))
+
+
+def add_trending_columns(engine):
+    # Databases created before trending activity was stored get the (empty) columns added.
+    with engine.begin() as connection:
+        columns = {column['name'] for column in inspect(connection).get_columns('podcasts')}
+        for name in ('trending_key', 'trending_updated'):
+            if name not in columns:
+                connection.exec_driver_sql(f'ALTER TABLE podcasts ADD COLUMN {name} FLOAT')
+
+
+def add_playlist_positions(engine):
+    # Databases created before playlists kept their order get the position column added. The order their
+    # existing members were added in was never stored, so those are numbered in id order.
+    with engine.begin() as connection:
+        for table, member_column in PLAYLIST_MEMBER_COLUMNS:
+            columns = {column['name'] for column in inspect(connection).get_columns(table.name)}
+            if 'position' in columns:
+                continue
+            connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN position INTEGER')
+            earlier = table.alias()
+            connection.execute(table.update().values(position=select(func.count()).where(
+                earlier.c.playlist_id == table.c.playlist_id,
+                earlier.c[member_column] <= table.c[member_column]).scalar_subquery()))
+
+
+def remove_duplicate_playlist_members(engine):
+    # Older databases could hold the same member twice in a playlist, which the unique indexes would reject.
+    # Only a table still without its unique index can hold duplicates; each duplicated member is put back as a
+    # single row, keeping its first position.
+    with engine.begin() as connection:
+        for table, member_id in PLAYLIST_MEMBER_COLUMNS:
+            unique_index = next(index.name for index in table.indexes if index.unique)
+            if unique_index in {index['name'] for index in inspect(connection).get_indexes(table.name)}:
+                continue
+            has_position = 'position' in {column['name'] for column in inspect(connection).get_columns(table.name)}
+            member_column = table.c[member_id]
+            duplicates = connection.execute(
+                select(table.c.playlist_id, member_column,
+                       func.min(table.c.position) if has_position else None)
+                .group_by(table.c.playlist_id, member_column)
+                .having(func.count() > 1)).all()
+            for playlist_id, member, position in duplicates:
+                connection.execute(table.delete().where(table.c.playlist_id == playlist_id, member_column == member))
+                row = {'playlist_id': playlist_id, member_id: member}
+                if has_position:
+                    row['position'] = position
+                connection.execute(table.insert().values(row))
+
+
+def upgrade_schema(engine):
+    add_review_aggregates(engine)
+    add_trending_columns(engine)
+    remove_duplicate_playlist_members(engine)
+    add_playlist_positions(engine)
+    create_indexes(engine)
+    drop_unused_indexes(engine)
+
+
+def create_indexes(engine):
+    # create_all() skips the indexes of tables that already exist, so databases created before an index was
+    # declared get it added here.
+    with engine.begin() as connection:
+        for table in mapper_registry.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def drop_unused_indexes(engine):
+    with engine.begin() as connection:
+        for name in DROPPED_INDEXES:
+            connection.exec_driver_sql(f'DROP INDEX IF EXISTS {name}')
+
 
 def map_model_to_tables():
     mapper_registry.map_imperatively(Author, authors_table, properties={
@@ -120,11 +267,13 @@ def map_model_to_tables():
         '_language': podcast_table.c.language,
         '_website': podcast_table.c.website_url,
         '_itunes_id': podcast_table.c.itunes_id,
+        '_review_count': podcast_table.c.review_count,
+        '_rating_total': podcast_table.c.rating_total,
         '_author': relationship(Author),
         '_episodes': relationship(Episode, back_populates='_podcast'),
         '_Podcast__reviews': relationship(Review, back_populates='_Review__podcast'),
         '_playlists': relationship(Playlist, secondary=playlist_podcasts_table, back_populates='_podcasts')
-    })
+    }, exclude_properties=['trending_key', 'trending_updated'])
 
     mapper_registry.map_imperatively(Episode, episode_table, properties={
         '_id': episode_table.c.episode_id,
@@ -137,21 +286,27 @@ def map_model_to_tables():
         '_playlists': relationship(Playlist, secondary=playlist_episodes_table, back_populates='_episodes')
     })
 
-    mapper_registry.map_imperatively(Review, reviews_table, properties={
+    review_mapper = mapper_registry.map_imperatively(Review, reviews_table, properties={
         '_Review__id': reviews_table.c.review_id,
         '_Review__comment': reviews_table.c.comment,
         '_Review__rating': reviews_table.c.rating,
         '_Review__user': relationship(User, back_populates='_User__reviews'),
         '_Review__podcast': relationship(Podcast, back_populates='_Podcast__reviews'),
     })
+    event.listen(review_mapper, 'after_insert', count_review)
 
     mapper_registry.map_imperatively(Playlist, playlist_table, properties={
         '_id': playlist_table.c.id,
         '_user': relationship(User, back_populates='_playlists'),
         '_title': playlist_table.c.title,
         '_description': playlist_table.c.description,
-        '_episodes': relationship(Episode, secondary=playlist_episodes_table),
-        '_podcasts': relationship(Podcast, secondary=playlist_podcasts_table),
+        # keyed by id and in the order the members were added, like the dicts Playlist builds for itself
+        '_episodes': relationship(Episode, secondary=playlist_episodes_table,
+                                  collection_class=attribute_keyed_dict('_id'),
+                                  order_by=[playlist_episodes_table.c.position, playlist_episodes_table.c.episode_id]),
+        '_podcasts': relationship(Podcast, secondary=playlist_podcasts_table,
+                                  collection_class=attribute_keyed_dict('_id'),
+                                  order_by=[playlist_podcasts_table.c.position, playlist_podcasts_table.c.podcast_id]),
     })
 
 
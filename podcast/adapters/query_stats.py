@@ -0,0 +1,89 @@
+import heapq
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+# How many of a request's slowest statements are kept, and how many finished requests the debug endpoint shows.
+SLOWEST_KEPT = 5
+RECENT_KEPT = 50
+
+
+class QueryStats:
+    """Statement count, total time and the slowest statements of the SQL one request executed."""
+
+    def __init__(self, slowest_kept: int = SLOWEST_KEPT):
+        self.count = 0
+        self.total_time = 0.0
+        self._slowest_kept = slowest_kept
+        self._slowest = []  # min-heap of (duration, sequence number, statement)
+        # a request can run queries on several threads at once (see SqlAlchemyRepository._fan_out)
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float):
+        with self._lock:
+            self.count += 1
+            self.total_time += duration
+            entry = (duration, self.count, statement)
+            if len(self._slowest) < self._slowest_kept:
+                heapq.heappush(self._slowest, entry)
+            elif duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self) -> list[tuple[float, str]]:
+        """(duration, statement) pairs, slowest first."""
+        return [(duration, statement) for duration, _, statement in sorted(self._slowest, reverse=True)]
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_time * 1000, 3),
+            'slowest': [{'ms': round(duration * 1000, 3), 'statement': statement}
+                        for duration, statement in self.slowest],
+        }
+
+
+def instrument_engine(engine):
+    """Times every statement engine executes and adds it to the current request's QueryStats, if it has one."""
+
+    # The start time lives on the statement's execution context, which is dropped with the statement, so one
+    # that raises (and never reaches after_cursor_execute) leaves nothing behind on the connection.
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._query_start
+        if has_request_context() and 'query_stats' in g:
+            g.query_stats.record(statement, duration)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+
+def init_query_stats(app, engine):
+    """Collects QueryStats for each request to app and reports them in the X-Query-Count and X-Query-Time
+    response headers. With QUERY_STATS_ENDPOINT set, /debug/queries lists the most recent requests' stats."""
+    instrument_engine(engine)
+    recent = deque(maxlen=RECENT_KEPT)
+    app.extensions['query_stats'] = recent
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None or request.endpoint == 'query_stats':
+            return response
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers['X-Query-Time'] = f'{stats.total_time * 1000:.3f}ms'
+        recent.append({'method': request.method, 'path': request.full_path.rstrip('?'), **stats.as_dict()})
+        return response
+
+    if app.config.get('QUERY_STATS_ENDPOINT'):
+        # Lists statement text (never parameters), so only switch it on where the SQL may be seen.
+        app.add_url_rule('/debug/queries', 'query_stats', lambda: jsonify(list(reversed(recent))))
@@ -1,9 +1,62 @@
 from abc import ABC, abstractmethod
+from collections import namedtuple
 from typing import List
 from podcast.domainmodel.model import Category, Author, Podcast, Episode, User, Playlist, Review
 
 repo_instance = None
 
+# Set alongside repo_instance when the async views are enabled (see AbstractAsyncRepository).
+async_repo_instance = None
+
+
+def format_average_rating(review_count: int, rating_total: int) -> str:
+    if not review_count:
+        return 'No ratings yet!'
+    return '{0:.1f}'.format(rating_total / review_count)
+
+
+class Page(namedtuple('Page', ['items', 'total', 'page', 'per_page'])):
+    """One page of a listing: its items plus the size of the whole listing."""
+    __slots__ = ()
+
+    @property
+    def total_pages(self):
+        return (self.total + self.per_page - 1) // self.per_page
+
+
+def page_offset(page: int, per_page: int) -> int:
+    return (max(page, 1) - 1) * per_page
+
+
+def paginate(items, page: int, per_page: int) -> Page:
+    """Slices one page out of an already ordered list."""
+    start = page_offset(page, per_page)
+    return Page(list(items[start:start + per_page]), len(items), max(page, 1), per_page)
+
+
+# Everything the podcast description page shows about one podcast.
+PodcastDetails = namedtuple('PodcastDetails', ['podcast', 'episodes', 'reviews', 'average_rating'])
+
+
+# What the catalogue page's dropdowns need, as plain values that stay valid outside any database session.
+CatalogueSidebar = namedtuple('CatalogueSidebar', ['version', 'categories', 'authors', 'podcasts'])
+SidebarItem = namedtuple('SidebarItem', ['id', 'name'])
+SidebarPodcast = namedtuple('SidebarPodcast', ['id', 'title'])
+
+
+def build_catalogue_sidebar(version, categories, authors, podcasts) -> CatalogueSidebar:
+    """Sorts (id, name) categories and authors by name and (id, title) podcasts by title, one entry per id."""
+    unique_podcasts = {}
+    for podcast_id, title in podcasts:
+        unique_podcasts.setdefault(podcast_id, SidebarPodcast(podcast_id, title))
+    return CatalogueSidebar(
+        version=version,
+        categories=tuple(sorted((SidebarItem(*category) for category in categories), key=lambda c: c.name or '')),
+        authors=tuple(sorted((SidebarItem(*author) for author in authors), key=lambda a: a.name or '')),
+        podcasts=tuple(sorted(unique_podcasts.values(), key=lambda p: p.title or '')),
+    )
+
+
 class AbstractRepository(ABC):
 
     @abstractmethod
@@ -54,6 +107,12 @@ class AbstractRepository(ABC):
     def get_playlist(self, user: User):
         pass
 
+    @abstractmethod
+    def get_playlist_summary(self, user: User):
+        """Returns user's playlist for its title, description and owner, without loading its episodes and
+        podcasts (see get_playlist_episodes_page and get_playlist_podcasts_page)."""
+        pass
+
     @abstractmethod
     def add_episode_to_playlist(self, new_episode: Episode, user: User):
         pass
@@ -113,3 +172,82 @@ class AbstractRepository(ABC):
     @abstractmethod
     def get_podcasts(self):
         pass
+
+    @abstractmethod
+    def get_podcasts_page(self, page: int, per_page: int, search_title: str = None, category_id: str = None,
+                          author_id: str = None, title_id: str = None) -> Page:
+        """Returns one page of the catalogue, narrowed by at most one of the catalogue page's filters: a
+        search query, a single podcast id, a category id or an author id (checked in that order)."""
+        pass
+
+    @abstractmethod
+    def get_episodes_page_by_podcast_id(self, podcast_id: int, page: int, per_page: int) -> Page:
+        pass
+
+    @abstractmethod
+    def get_playlist_episodes_page(self, user: User, page: int, per_page: int) -> Page:
+        """Returns one page of the episodes in user's playlist, in the order they were added."""
+        pass
+
+    @abstractmethod
+    def get_playlist_podcasts_page(self, user: User, page: int, per_page: int) -> Page:
+        """Returns one page of the podcasts in user's playlist, in the order they were added."""
+        pass
+
+    @abstractmethod
+    def get_user_reviews_page(self, username: str, page: int, per_page: int) -> Page:
+        """Returns one page of the user's reviews, oldest first."""
+        pass
+
+    @abstractmethod
+    def get_podcast_details(self, podcast_id: int, episode_page: int, per_page: int) -> PodcastDetails:
+        """Returns the podcast with its author, categories, one page of episodes and its reviews (with their
+        users) loaded, or None if there is no such podcast."""
+        pass
+
+    @abstractmethod
+    def get_trending_podcasts(self, n: int) -> List[Podcast]:
+        """Returns up to n podcasts with the most recent review and playlist activity, most active first."""
+        pass
+
+    @abstractmethod
+    def get_charts_version(self):
+        """Returns a value that changes whenever the catalogue is reloaded or a review or playlist add could
+        reorder the home page charts."""
+        pass
+
+    @abstractmethod
+    def get_catalogue_sidebar(self) -> CatalogueSidebar:
+        """Returns the catalogue page's sorted categories, authors and podcast titles, rebuilt only after the
+        catalogue changes."""
+        pass
+
+
+class AbstractAsyncRepository(ABC):
+    """The read-only queries behind the heaviest pages, as coroutines, so that a view can await the independent
+    ones together. Everything a page renders is loaded before the coroutine returns."""
+
+    @abstractmethod
+    async def get_podcast(self, podcast_id: int) -> Podcast:
+        pass
+
+    @abstractmethod
+    async def get_podcasts_page(self, page: int, per_page: int, search_title=None, category_id=None,
+                                author_id=None, title_id=None) -> Page:
+        pass
+
+    @abstractmethod
+    async def get_episodes_page_by_podcast_id(self, podcast_id: int, page: int, per_page: int) -> Page:
+        pass
+
+    @abstractmethod
+    async def get_reviews_by_podcast(self, podcast_id: int) -> List[Review]:
+        pass
+
+    @abstractmethod
+    async def get_average_rating(self, podcast_id: int) -> str:
+        pass
+
+    @abstractmethod
+    async def get_podcast_details(self, podcast_id: int, episode_page: int, per_page: int) -> PodcastDetails:
+        pass
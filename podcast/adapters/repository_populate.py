@@ -4,9 +4,10 @@ from pathlib2 import Path
 from podcast.adapters.database_repository import SqlAlchemyRepository
 from podcast.adapters.datareader.csvdatareader import CSVDataReader
 from podcast.adapters.repository import AbstractRepository
+from podcast.adapters.service.catalogue_snapshot import load_data_with_snapshot
 
 
-def populate(data_path: Path, session_factory, repo: AbstractRepository, database_mode: bool):
+def populate(data_path: Path, session_factory, repo: AbstractRepository, database_mode: bool, snapshot_path=None):
     dir_name = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.'))
 
     podcast_filename = os.path.join(dir_name, str(Path(data_path) / "podcasts.csv"))
@@ -19,5 +20,7 @@ def populate(data_path: Path, session_factory, repo: AbstractRepository, databas
     if database_mode:
         repository = SqlAlchemyRepository(session_factory)
         repository.load_data(csv_reader)
+    elif snapshot_path:
+        load_data_with_snapshot(repo, csv_reader, snapshot_path)
     else:
-        repo.load_data(csv_reader)
\ No newline at end of file
+        repo.load_data(csv_reader)
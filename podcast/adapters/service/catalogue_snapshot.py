@@ -0,0 +1,75 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Bump whenever the shape of the pickled catalogue changes (new indexes, domain model layout, ...) so that
+# snapshots written by older code are rebuilt instead of loaded.
+SNAPSHOT_VERSION = 5
+
+
+def _file_fingerprint(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    stat = os.stat(filename)
+    return os.path.basename(filename), stat.st_mtime_ns, stat.st_size, digest.hexdigest()
+
+
+def snapshot_key(csv_reader):
+    """Identifies the CSV data a snapshot was built from: snapshot version plus each file's mtime and hash."""
+    return (
+        SNAPSHOT_VERSION,
+        _file_fingerprint(csv_reader.podcasts_file),
+        _file_fingerprint(csv_reader.episodes_file),
+    )
+
+
+def save_snapshot(snapshot_path, key, catalogue):
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file first so a worker never reads a half-written snapshot.
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump((key, catalogue), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, snapshot_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def load_snapshot(snapshot_path, key):
+    """Returns the catalogue stored at snapshot_path, or None if it is missing, unreadable or stale.
+
+    Snapshots are unpickled, so snapshot_path must only ever point at a file this application wrote.
+    """
+    try:
+        with open(snapshot_path, 'rb') as file:
+            stored_key, catalogue = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError, ValueError):
+        return None
+    if stored_key != key:
+        return None
+    return catalogue
+
+
+def load_data_with_snapshot(repository, csv_reader, snapshot_path):
+    """Fills a MemoryRepository from a snapshot of its catalogue, rebuilding the snapshot from CSV when needed.
+
+    Returns True when the catalogue came from the snapshot.
+    """
+    key = snapshot_key(csv_reader)
+    catalogue = load_snapshot(snapshot_path, key)
+    if catalogue is not None:
+        repository.restore_catalogue(catalogue, csv_reader)
+        return True
+
+    repository.load_data(csv_reader)
+    try:
+        save_snapshot(snapshot_path, key, repository.export_catalogue())
+    except OSError as error:
+        print(f'Could not write catalogue snapshot {snapshot_path}: {error}')
+    return False
@@ -0,0 +1,99 @@
+import mmap
+import tempfile
+import threading
+from array import array
+
+from podcast.domainmodel.model import Episode
+
+# The text columns kept out of the Episode objects, in the order they are stored for each episode.
+TEXT_FIELDS = ('description', 'audio_link')
+_DESCRIPTION, _AUDIO_LINK = range(len(TEXT_FIELDS))
+
+
+class EpisodeTextStore:
+    """The episodes' long text fields, packed back to back as UTF-8 in one file and read through mmap.
+
+    Only the offsets array stays on the heap. The text is decoded when an episode's description or audio link
+    is actually read, and the mapped pages are clean file-backed pages the OS can share and drop.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array('Q', [0])
+        # (mapping, mapped size), swapped as one value so a reader never pairs a mapping with another's size
+        self._mapping = (b'', 0)
+        # serialises appends and remaps; reads of an up to date mapping take no lock
+        self._lock = threading.Lock()
+
+    def append(self, *texts: str) -> int:
+        """Stores one episode's TEXT_FIELDS and returns the index to read them back with."""
+        with self._lock:
+            index = (len(self._offsets) - 1) // len(TEXT_FIELDS)
+            for text in texts:
+                data = text.encode('utf-8')
+                self._file.write(data)
+                self._offsets.append(self._offsets[-1] + len(data))
+            return index
+
+    def _view(self):
+        view, mapped_size = self._mapping
+        if mapped_size != self._offsets[-1]:
+            with self._lock:
+                view, mapped_size = self._mapping
+                size = self._offsets[-1]
+                if mapped_size != size:
+                    self._file.flush()
+                    view = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else b''
+                    # The old mapping is not closed here: other threads may still be slicing it. It is unmapped
+                    # once the last of them lets go of it.
+                    self._mapping = (view, size)
+        return view
+
+    def text(self, index: int, field: int) -> str:
+        position = index * len(TEXT_FIELDS) + field
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return self._view()[start:end].decode('utf-8')
+
+    def __len__(self):
+        return (len(self._offsets) - 1) // len(TEXT_FIELDS)
+
+    def __getstate__(self):
+        # Catalogue snapshots store the text itself; loading one writes it to a fresh file.
+        size = self._offsets[-1]
+        return self._offsets, bytes(self._view()[:size]) if size else b''
+
+    def __setstate__(self, state):
+        offsets, data = state
+        self._file = tempfile.TemporaryFile()
+        self._file.write(data)
+        self._offsets = offsets
+        self._mapping = (b'', 0)
+        self._lock = threading.Lock()
+
+
+class StoredEpisode(Episode):
+    """An Episode whose description and audio link are read from an EpisodeTextStore when first needed."""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, episode_id: int, podcast, title: str, audio_length: int, publication_date: str,
+                 store: EpisodeTextStore, index: int):
+        super().__init__(episode_id, podcast, title, audio_length, publication_date, None, None)
+        self._store = store
+        self._index = index
+
+    @property
+    def description(self):
+        if self._description is not None:
+            return self._description
+        return self._store.text(self._index, _DESCRIPTION)
+
+    @description.setter
+    def description(self, new_description):
+        Episode.description.fset(self, new_description)
+
+    @property
+    def audio_link(self):
+        if self._audio_link is not None:
+            return self._audio_link
+        return self._store.text(self._index, _AUDIO_LINK)
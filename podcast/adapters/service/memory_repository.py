@@ -1,10 +1,50 @@
 from abc import ABC
-
-from podcast.adapters.repository import AbstractRepository
+from collections.abc import Sequence
+from itertools import islice
+
+from podcast.adapters.repository import AbstractRepository, format_average_rating, build_catalogue_sidebar, paginate, \
+    page_offset, Page, PodcastDetails
+from podcast.adapters.service.episode_store import EpisodeTextStore, StoredEpisode
+from podcast.adapters.service.search_index import SearchIndex
+from podcast.adapters.trending import TrendingTracker
 from podcast.domainmodel.model import Category, Author, Podcast, Episode, Playlist, User, Review
 
 
+class ReadOnlyList(Sequence):
+    """A read-only view of a list, made without copying it. It compares equal to a list with the same items."""
+    __slots__ = ('_items',)
+
+    def __init__(self, items: list):
+        self._items = items
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyList):
+            other = other._items
+        return self._items == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._items)
+
+
 class MemoryRepository(AbstractRepository, ABC):
+    # Everything built by load_data from the CSV files; saved to and restored from catalogue snapshots.
+    CATALOGUE_ATTRIBUTES = (
+        'podcasts', 'episodes', 'authors', 'categories',
+        '_podcasts_by_id', '_episodes_by_id', '_search_index',
+        '_podcasts_by_category_id', '_podcasts_by_author_id', '_episode_text',
+    )
+
     def __init__(self):
         self.csv_reader = None
         self.podcasts = []
@@ -14,53 +54,109 @@ class MemoryRepository(AbstractRepository, ABC):
         self.authors = {}
         self.categories = {}
         self.all_playlists = []
+        # user id -> that user's playlist
+        self._playlists_by_user_id = {}
         self.recently_added_episode = -1
         self.recently_added_podcast = -1
+        self._trending = TrendingTracker()
+        # bumped by every review and playlist add, which can reorder the trending chart
+        self._activity_version = 0
+        # id -> object lookup tables, kept in step with the lists above
+        self._podcasts_by_id = {}
+        self._episodes_by_id = {}
+        self._episode_text = EpisodeTextStore()
+        # category id / author id -> podcasts, in the same order as self.podcasts
+        self._podcasts_by_category_id = {}
+        self._podcasts_by_author_id = {}
+        self._search_index = SearchIndex()
+        # bumped whenever the catalogue is (re)loaded, so the cached sidebar gets rebuilt
+        self._catalogue_version = 0
+        self._catalogue_sidebar = None
+
+    @property
+    def users(self):
+        # read-only, so users are stored through add_user, which also files them by username
+        return ReadOnlyList(self._users)
+
+    @users.setter
+    def users(self, users):
+        self._users = list(users)
+        self._users_by_name = {}
+        for user in users:
+            self._users_by_name.setdefault(user.username.lower(), user)
+
+    @property
+    def reviews(self):
+        # read-only, so that reviews can only be stored through add_review (or by assigning a whole new list),
+        # which keep the buckets below in step
+        return ReadOnlyList(self._reviews)
+
+    @reviews.setter
+    def reviews(self, reviews):
+        self._reviews = []
+        self._reviews_by_id = {}
+        # podcast id -> reviews and lowercase username -> reviews, each in the order they were added
+        self._reviews_by_podcast = {}
+        self._reviews_by_user = {}
+        # podcast id -> [review count, rating total]
+        self._rating_totals = {}
+        for review in reviews:
+            self.add_review(review)
 
     def load_data(self, csv_reader):
         self.csv_reader = csv_reader
-        self.load_categories()
-        self.load_authors()
+        self.categories = {}
+        self.authors = {}
         self.load_podcasts()
         self.load_episodes()
+        self._search_index = SearchIndex(self.podcasts)
+        self._catalogue_changed()
+
+    def export_catalogue(self):
+        return {name: getattr(self, name) for name in self.CATALOGUE_ATTRIBUTES}
+
+    def restore_catalogue(self, catalogue, csv_reader=None):
+        self.csv_reader = csv_reader
+        for name in self.CATALOGUE_ATTRIBUTES:
+            setattr(self, name, catalogue[name])
+        self._catalogue_changed()
+
+    def _catalogue_changed(self):
+        self._catalogue_version += 1
+        self._catalogue_sidebar = None
+
+    def get_catalogue_sidebar(self):
+        sidebar = self._catalogue_sidebar
+        if sidebar is None or sidebar.version != self._catalogue_version:
+            sidebar = self._catalogue_sidebar = build_catalogue_sidebar(
+                self._catalogue_version,
+                [(category.id, category.name) for category in self.categories.values()],
+                [(author.id, author.name) for author in self.authors.values()],
+                [(podcast.id, podcast.title) for podcast in self.podcasts],
+            )
+        return sidebar
 
     def load_podcasts(self):
-        podcasts_data = self.csv_reader.get_podcasts()
-        self.podcasts = [self._create_podcast(row) for row in podcasts_data]
+        # Categories and authors are created on first sight while the podcasts are read, in a single pass.
+        self.podcasts = [self._create_podcast(row) for row in self.csv_reader.iter_podcasts()]
+        self._podcasts_by_id = {}
+        self._podcasts_by_category_id = {}
+        self._podcasts_by_author_id = {}
+        for podcast in self.podcasts:
+            self._podcasts_by_id.setdefault(podcast.id, podcast)
+            self._podcasts_by_author_id.setdefault(podcast.author.id, []).append(podcast)
+            for category in podcast.categories:
+                self._podcasts_by_category_id.setdefault(category.id, []).append(podcast)
 
     def load_episodes(self):
-        episodes_data = self.csv_reader.get_episodes()
-        self.episodes = [self._create_episode(row) for row in episodes_data]
+        # Descriptions and audio links go to a memory-mapped text store and are only decoded when shown.
+        self._episode_text = EpisodeTextStore()
+        self.episodes = [self._create_episode(row) for row in self.csv_reader.iter_episodes()]
+        self._episodes_by_id = {}
+        for episode in self.episodes:
+            self._episodes_by_id.setdefault(episode.id, episode)
         self._assign_episodes_to_podcasts()
 
-    def load_categories(self):
-        podcasts_data = self.csv_reader.get_podcasts()
-        unique_categories = {}
-        for row in podcasts_data:
-            category_names = row.get('categories', "").split('|')
-            for name in category_names:
-                normalized_name = name.strip().lower()
-                if normalized_name not in unique_categories:
-                    unique_categories[normalized_name] = Category(
-                        category_id=len(unique_categories) + 1,
-                        name=normalized_name.capitalize()
-                    )
-
-        self.categories = unique_categories
-
-    def load_authors(self):
-        podcasts_data = self.csv_reader.get_podcasts()
-        unique_authors = {}
-        for row in podcasts_data:
-            author_name = row.get('author', "").strip()
-            if author_name and author_name not in unique_authors:
-                author_id = len(unique_authors) + 1
-                unique_authors[author_name] = Author(
-                    author_id=author_id,
-                    name=author_name
-                )
-        self.authors = unique_authors
-
     def _create_podcast(self, data):
         author_name = data.get('author', "").strip()
         author = self.authors.get(author_name)
@@ -82,22 +178,32 @@ class MemoryRepository(AbstractRepository, ABC):
 
         author.add_podcast(podcast)
 
-        category_names = data.get('categories', "").split('|')
-        for name in category_names:
+        for name in self._category_names(data):
             category = self._create_category(name)
             podcast.add_category(category)
 
         return podcast
 
+    @staticmethod
+    def _category_names(data):
+        category_names = data.get('categories', "")
+        if isinstance(category_names, str):
+            category_names = category_names.split('|')
+        return category_names
+
     def _create_episode(self, data):
-        episode = Episode(
+        index = self._episode_text.append(
+            data.get('description', 'Unknown'),
+            data.get('audio', data.get('audio_link', 'Unknown')),
+        )
+        episode = StoredEpisode(
             episode_id=int(data.get('id', 0)),
             podcast=self._get_podcast(int(data.get('podcast_id', 0))),
             title=data.get('title', "Unknown"),
             audio_length=int(data.get('audio_length', 0)),
             publication_date=data.get('pub_date', 'Unknown'),
-            description=data.get('description', 'Unknown'),
-            audio_link=data.get('audio_link', 'Unknown')
+            store=self._episode_text,
+            index=index,
         )
         return episode
 
@@ -113,24 +219,17 @@ class MemoryRepository(AbstractRepository, ABC):
         return self.categories[normalized_name]
 
     def _add_category_to_podcast(self, data):
-        category_names = data.get('categories', "").split('|')
         categories = []
-        for name in category_names:
+        for name in self._category_names(data):
             category = self._create_category(name)
             categories.append(category)
         return categories
 
     def _get_podcast(self, podcast_id):
-        for podcast in self.podcasts:
-            if podcast.id == int(podcast_id):
-                return podcast
-        return None
+        return self._podcasts_by_id.get(int(podcast_id))
 
     def _get_episode(self, episode_id):
-        for episode in self.episodes:
-            if episode.id == int(episode_id):
-                return episode
-        return None
+        return self._episodes_by_id.get(int(episode_id))
 
     def get_podcast(self, podcast_id):
         return self._get_podcast(podcast_id)
@@ -142,18 +241,14 @@ class MemoryRepository(AbstractRepository, ABC):
         return sorted(self.categories.values(), key=lambda c: c.name)
 
     def search_podcast_by_category_id(self, category_id):
-        category = next((c for c in self.categories.values() if c.id == int(category_id)), None)
-        if category is None:
-            return []
-        podcasts_in_category = [podcast for podcast in self.podcasts if category in podcast.categories]
-        return podcasts_in_category
+        return list(self._podcasts_by_category_id.get(int(category_id), []))
 
     def get_authors(self):
         return list(self.authors.values())
 
 
     def search_podcast_by_author_id(self, author_id):
-        return [podcast for podcast in self.podcasts if podcast.author.id == int(author_id)]
+        return list(self._podcasts_by_author_id.get(int(author_id), []))
 
 
     def _assign_episodes_to_podcasts(self):
@@ -163,25 +258,53 @@ class MemoryRepository(AbstractRepository, ABC):
                 podcast.episodes.append(episode)
 
     def search_podcasts_by_query(self, query):
-        matching_podcasts = []
+        return [self._podcasts_by_id[podcast_id] for podcast_id in self._search_index.search(query)]
 
-        for podcast in self.podcasts:
-            if query.lower() in podcast.title.lower() or \
-                    query.lower() in podcast.author.name.lower() or \
-                    any(query.lower() in category.name.lower() for category in podcast.categories):
-                matching_podcasts.append(podcast)
+    def get_podcast_details(self, podcast_id, episode_page, per_page):
+        podcast = self.get_podcast(podcast_id)
+        if podcast is None:
+            return None
+        return PodcastDetails(
+            podcast=podcast,
+            episodes=self.get_episodes_page_by_podcast_id(podcast.id, episode_page, per_page),
+            reviews=self.get_reviews_by_podcast(podcast.id),
+            average_rating=self.get_average_rating(podcast.id),
+        )
+
+    def _record_activity(self, podcast_id, event):
+        self._trending.record(podcast_id, event)
+        self._activity_version += 1
+
+    def get_charts_version(self):
+        return self._catalogue_version, self._activity_version
+
+    def get_trending_podcasts(self, n):
+        return [self._podcasts_by_id[podcast_id] for podcast_id in self._trending.top(n)
+                if podcast_id in self._podcasts_by_id]
+
+    def _filtered_podcasts(self, search_title=None, category_id=None, author_id=None, title_id=None):
+        # Returns the stored lists where possible; callers only ever slice them.
+        if search_title:
+            return self.search_podcasts_by_query(search_title)
+        if title_id:
+            podcast = self.get_podcast(title_id)
+            return [podcast] if podcast is not None else []
+        if category_id:
+            return self._podcasts_by_category_id.get(int(category_id), [])
+        if author_id:
+            return self._podcasts_by_author_id.get(int(author_id), [])
+        return self.podcasts
 
-        return matching_podcasts
+    def get_podcasts_page(self, page, per_page, search_title=None, category_id=None, author_id=None, title_id=None):
+        return paginate(self._filtered_podcasts(search_title, category_id, author_id, title_id), page, per_page)
 
     def add_user(self, user: User):
-        user.id = len(self.users)
-        self.users.append(user)
+        user.id = len(self._users)
+        self._users.append(user)
+        self._users_by_name.setdefault(user.username.lower(), user)
 
     def _get_user(self, username):
-        for user in self.users:
-            if user.username.lower() == username.lower():
-                return user
-        return None
+        return self._users_by_name.get(username.lower())
 
     def get_user(self, username):
         return self._get_user(username)
@@ -190,21 +313,23 @@ class MemoryRepository(AbstractRepository, ABC):
         return self.users
 
     def get_user_reviews(self, username):
-        reviewlist = []
-        user = self._get_user(username)
-        for review in self.reviews:
-            if review.user.username.lower() == username.lower():
-                reviewlist.append(review)
-        return reviewlist
+        return list(self._reviews_by_user.get(username.lower(), []))
+
+    def get_user_reviews_page(self, username, page, per_page):
+        return paginate(self._reviews_by_user.get(username.lower(), []), page, per_page)
 
     def add_review(self, review: Review):
-        self.reviews.append(review)
+        self._reviews.append(review)
+        self._reviews_by_id.setdefault(review.id, review)
+        self._reviews_by_podcast.setdefault(review.podcast.id, []).append(review)
+        self._reviews_by_user.setdefault(review.user.username.lower(), []).append(review)
+        totals = self._rating_totals.setdefault(review.podcast.id, [0, 0])
+        totals[0] += 1
+        totals[1] += review.rating
+        self._record_activity(review.podcast.id, 'review')
 
     def _get_review(self, rev_id):
-        for review in self.reviews:
-            if review.id == rev_id:
-                return review
-        return None
+        return self._reviews_by_id.get(rev_id)
 
     def get_review(self, rev_id):
         return self._get_review(rev_id)
@@ -213,36 +338,47 @@ class MemoryRepository(AbstractRepository, ABC):
         return self.reviews
 
     def get_reviews_by_podcast(self, podcast_id):
-        review_list = []
-        for review in self.reviews:
-            if self.get_podcast(podcast_id) == review.podcast:
-                review_list.append(review)
-        return review_list
+        return list(self._reviews_by_podcast.get(int(podcast_id), []))
 
     def create_playlist(self, user: User):
-        user_found = False
-        for playlist in self.all_playlists:
-            if playlist.user == user:
-                user_found = True
-        if not user_found:
+        if user.id not in self._playlists_by_user_id:
             new_playlist = Playlist(len(self.all_playlists), user, user.username + "'s Playlist",
                                     "Save episodes and whole playlists to watch later!", [], [])
             self.all_playlists.append(new_playlist)
+            self._playlists_by_user_id[user.id] = new_playlist
             user.add_playlist(new_playlist)
 
     def get_playlist(self, user: User):
-        for playlist in self.all_playlists:
-            if playlist.user == user:
-                return playlist
-        raise ValueError("User does not have playlist.")
+        playlist = self._playlists_by_user_id.get(user.id)
+        if playlist is None:
+            raise ValueError("User does not have playlist.")
+        return playlist
+
+    def get_playlist_summary(self, user: User):
+        return self.get_playlist(user)
+
+    # A playlist's id -> member dicts already iterate in the order members were added, so a page is sliced
+    # straight out of them without copying or sorting the whole playlist.
+    def get_playlist_episodes_page(self, user: User, page, per_page):
+        return _members_page(self.get_playlist(user)._episodes, page, per_page)
+
+    def get_playlist_podcasts_page(self, user: User, page, per_page):
+        return _members_page(self.get_playlist(user)._podcasts, page, per_page)
 
     def add_episode_to_playlist(self, new_episode: Episode, user: User):
         playlist = self.get_playlist(user)
+        already_there = playlist.has_episode(new_episode)
         playlist.add_episode(new_episode)
+        # a repeated add leaves the playlist as it was, so it does not count towards trending either
+        if not already_there and new_episode.podcast is not None:
+            self._record_activity(new_episode.podcast.id, 'playlist_episode')
 
     def add_podcast_to_playlist(self, new_podcast: Podcast, user: User):
         playlist = self.get_playlist(user)
+        already_there = playlist.has_podcast(new_podcast)
         playlist.add_podcast(new_podcast)
+        if not already_there:
+            self._record_activity(new_podcast.id, 'playlist_podcast')
 
     def delete_episode_from_playlist(self, del_episode: Episode, user: User):
         playlist = self.get_playlist(user)
@@ -268,13 +404,8 @@ class MemoryRepository(AbstractRepository, ABC):
         return self.recently_added_podcast
 
     def get_average_rating(self, podcast_id: int):
-        review_list = self.get_reviews_by_podcast(podcast_id)
-        if len(review_list) == 0:
-            return 'No ratings yet!'
-        total_sum = 0
-        for review in review_list:
-            total_sum += review.rating
-        return '{0:.1f}'.format(total_sum / len(review_list))
+        review_count, rating_total = self._rating_totals.get(int(podcast_id), (0, 0))
+        return format_average_rating(review_count, rating_total)
 
 
     def add_episode(self, episode: Episode):
@@ -286,4 +417,13 @@ class MemoryRepository(AbstractRepository, ABC):
 
     def get_episodes_by_podcast_id(self, podcast_id: int) -> list[Episode]:
         podcast = self.get_podcast(podcast_id)
-        return podcast.episodes
\ No newline at end of file
+        return podcast.episodes
+
+    def get_episodes_page_by_podcast_id(self, podcast_id, page, per_page):
+        podcast = self.get_podcast(podcast_id)
+        return paginate(podcast.episodes if podcast is not None else [], page, per_page)
+
+
+def _members_page(members: dict, page, per_page) -> Page:
+    start = page_offset(page, per_page)
+    return Page(list(islice(members.values(), start, start + per_page)), len(members), max(page, 1), per_page)
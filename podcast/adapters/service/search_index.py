@@ -0,0 +1,113 @@
+from typing import Iterable, List
+
+from podcast.domainmodel.model import Podcast
+
+# Matches in a podcast's title count for more than matches in its author's name, which count for more than
+# matches in one of its categories.
+FIELD_WEIGHTS = {
+    'title': 3,
+    'author': 2,
+    'category': 1,
+}
+
+# Every substring of up to this many characters is indexed. Longer queries are answered by intersecting the
+# postings of their trigrams and then confirming the candidates with a substring check.
+MAX_GRAM_LENGTH = 3
+
+# Paging through a result list repeats the same query, so recent results are kept.
+RESULT_CACHE_SIZE = 256
+
+
+def _grams(text: str):
+    grams = set()
+    for length in range(1, MAX_GRAM_LENGTH + 1):
+        for start in range(len(text) - length + 1):
+            grams.add(text[start:start + length])
+    return grams
+
+
+def _is_prefix_match(query: str, text: str) -> bool:
+    return text.startswith(query) or (' ' + query) in text
+
+
+class SearchIndex:
+    """Inverted n-gram index over the title, author name and category names of each podcast.
+
+    The index is built once from the catalogue and answers case-insensitive substring queries without
+    scanning every podcast. Results are ranked by field weight, with a bonus for matches at the start of a
+    word, and ties keep catalogue order.
+    """
+
+    def __init__(self, podcasts: Iterable[Podcast] = ()):
+        self._podcast_ids = []
+        self._fields = []
+        self._postings = {}
+        self._results = {}
+        for podcast in podcasts:
+            self.add_podcast(podcast)
+
+    def add_podcast(self, podcast: Podcast):
+        position = len(self._podcast_ids)
+        fields = {
+            'title': [podcast.title.lower()],
+            'author': [podcast.author.name.lower()] if podcast.author is not None else [],
+            'category': [category.name.lower() for category in podcast.categories],
+        }
+        self._results.clear()
+        self._podcast_ids.append(podcast.id)
+        self._fields.append(fields)
+
+        grams = set()
+        for texts in fields.values():
+            for text in texts:
+                grams.update(_grams(text))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self):
+        return len(self._podcast_ids)
+
+    def _candidates(self, query: str):
+        if len(query) <= MAX_GRAM_LENGTH:
+            return self._postings.get(query, [])
+        postings = []
+        for start in range(len(query) - MAX_GRAM_LENGTH + 1):
+            posting = self._postings.get(query[start:start + MAX_GRAM_LENGTH])
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return sorted(candidates)
+
+    def _score(self, query: str, position: int) -> int:
+        score = 0
+        for field, texts in self._fields[position].items():
+            matches = [text for text in texts if query in text]
+            if not matches:
+                continue
+            weight = FIELD_WEIGHTS[field]
+            if any(_is_prefix_match(query, text) for text in matches):
+                weight *= 2
+            score += weight
+        return score
+
+    def search(self, query: str) -> List[int]:
+        """Returns the ids of the podcasts matching the query, best match first."""
+        query = query.strip().lower()
+        if not query:
+            return list(self._podcast_ids)
+
+        results = self._results.get(query)
+        if results is None:
+            ranked = []
+            for position in self._candidates(query):
+                score = self._score(query, position)
+                if score > 0:
+                    ranked.append((-score, position))
+            ranked.sort()
+            results = tuple(self._podcast_ids[position] for _, position in ranked)
+            if len(self._results) >= RESULT_CACHE_SIZE:
+                self._results.pop(next(iter(self._results)))
+            self._results[query] = results
+        return list(results)
@@ -0,0 +1,90 @@
+import heapq
+import math
+import threading
+import time
+from operator import itemgetter
+
+# How much one event counts towards a podcast's trending score.
+EVENT_WEIGHTS = {
+    'review': 3.0,
+    'playlist_podcast': 2.0,
+    'playlist_episode': 1.0,
+}
+
+# An event's weight halves every HALF_LIFE seconds.
+HALF_LIFE = 24 * 60 * 60
+
+# Scores are only kept for this many podcasts; the weakest one makes room for a newcomer that outscores it.
+CAPACITY = 200
+
+# Forward decay grows new events' weights instead of shrinking old ones, so scores are rescaled before the
+# growth factor gets anywhere near overflowing a float.
+_RESCALE_EXPONENT = 512
+
+
+class TrendingTracker:
+    """Time-decayed activity scores for the most active podcasts.
+
+    Uses forward decay: an event at time t adds weight * 2 ** ((t - landmark) / half_life), which ranks podcasts
+    exactly as decaying every score towards the present would, without ever touching the stored scores.
+    """
+
+    def __init__(self, half_life: float = HALF_LIFE, capacity: int = CAPACITY, clock=time.time):
+        self._half_life = half_life
+        self._capacity = capacity
+        self._clock = clock
+        self._landmark = clock()
+        self._scores = {}
+        self._lock = threading.Lock()
+
+    def record(self, podcast_id: int, event: str):
+        with self._lock:
+            exponent = (self._clock() - self._landmark) / self._half_life
+            if exponent > _RESCALE_EXPONENT:
+                self._rescale(exponent)
+                exponent = 0
+            value = EVENT_WEIGHTS[event] * 2 ** exponent
+
+            if podcast_id in self._scores:
+                self._scores[podcast_id] += value
+            elif len(self._scores) < self._capacity:
+                self._scores[podcast_id] = value
+            else:
+                weakest_id, weakest_score = min(self._scores.items(), key=itemgetter(1))
+                if value > weakest_score:
+                    del self._scores[weakest_id]
+                    self._scores[podcast_id] = value
+
+    def _rescale(self, exponent):
+        scale = 2.0 ** -exponent
+        self._landmark += exponent * self._half_life
+        for podcast_id in list(self._scores):
+            score = self._scores[podcast_id] * scale
+            if score > 0:
+                self._scores[podcast_id] = score
+            else:
+                # decayed to nothing
+                del self._scores[podcast_id]
+
+    def top(self, n: int) -> list[int]:
+        """Returns the ids of the n highest scoring podcasts, best first."""
+        with self._lock:
+            return [podcast_id for podcast_id, _ in heapq.nlargest(n, self._scores.items(), key=itemgetter(1))]
+
+    def __len__(self):
+        return len(self._scores)
+
+
+def trending_key(key, event: str, now: float, half_life: float = HALF_LIFE) -> float:
+    """Adds an event at time now to a stored trending key and returns the new key.
+
+    A key is log2 of the podcast's activity score forward-decayed to the Unix epoch. Keys rank podcasts exactly as
+    their current decayed scores do, they only ever grow, and unlike the scores themselves they never get near
+    overflowing a float, so they can be stored in the database and compared there. key is None for a podcast
+    without activity.
+    """
+    added = math.log2(EVENT_WEIGHTS[event]) + now / half_life
+    if key is None:
+        return added
+    high, low = max(key, added), min(key, added)
+    return high + math.log2(1 + 2 ** (low - high))
@@ -7,72 +7,66 @@ from wtforms.validators import DataRequired
 import podcast
 from podcast.authentication.authentication import login_required
 from podcast.description import review_services
+from podcast.home import home_services
 from flask import Blueprint, render_template, request, current_app, redirect, url_for
 from podcast.adapters import repository as repo
 description_blueprint = Blueprint('description_bp', __name__)
 
 
+def _description_arguments():
+    return {
+        'page': request.args.get('page', 1, type=int),
+        'catalogue_page': request.args.get('catalogue_page', 1, type=int),
+        'search_title': request.args.get('search_title'),
+        'category_id': request.args.get('category'),
+        'author_id': request.args.get('author'),
+        'title_id': request.args.get('title'),
+    }
+
+
 @description_blueprint.route('/description/<int:podcast_id>')
 def description(podcast_id):
-    page = request.args.get('page', 1, type=int)
-    catalogue_page = request.args.get('catalogue_page', 1, type=int)
-    search_title = request.args.get('search_title')
-    category_id = request.args.get('category')
-    author_id = request.args.get('author')
-    title_id = request.args.get('title')
+    args = _description_arguments()
     per_page = 3
 
     repository = repo.repo_instance
 
-    current_podcast = repository.get_podcast(podcast_id)
+    details = repository.get_podcast_details(podcast_id, args['page'], per_page)
 
-    if search_title:
-        list_of_podcasts = repository.search_podcasts_by_query(search_title)
-    elif title_id:
-        list_of_podcasts = [repository.get_podcast(int(title_id))]
-    elif category_id:
-        list_of_podcasts = repository.search_podcast_by_category_id(category_id)
-    elif author_id:
-        list_of_podcasts = repository.search_podcast_by_author_id(author_id)
-    else:
-        list_of_podcasts = repository.get_podcasts()
+    return _render_description(details, args)
 
-    start = (catalogue_page - 1) * per_page
-    end = start + per_page
-    paginated_podcasts = list_of_podcasts[start:end]
 
-    if current_podcast:
-        podcast_id = current_podcast.id
-        list_of_episodes = repository.get_episodes_by_podcast_id(podcast_id)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_episodes = list_of_episodes[start:end]
-        print(paginated_episodes)
-        total_episodes = len(list_of_episodes)
-        total_pages = (total_episodes + per_page - 1) // per_page
+async def description_async(podcast_id):
+    """description() on the async repository, which loads the podcast and its episodes concurrently.
+    create_app serves the description page with this when ASYNC_VIEWS is set."""
+    args = _description_arguments()
+    per_page = 3
 
-        reviews = repository.get_reviews_by_podcast(podcast_id)
+    details = await repo.async_repo_instance.get_podcast_details(podcast_id, args['page'], per_page)
 
+    return _render_description(details, args)
+
+
+def _render_description(details, args):
+    if details:
+        repository = repo.repo_instance
         recently_added_episode = repository.get_recently_added_episode()
         recently_added_podcast = repository.get_recently_added_podcast()
 
-        average_rating = repository.get_average_rating(podcast_id)
-
         return render_template(
             'podcastDescription.html',
-            podcast=current_podcast,
-            episodes=paginated_episodes,
-            reviews=reviews,
-            page=page,
-            total_pages=total_pages,
-            catalogue_page=catalogue_page,
-            search_title=search_title,
-            category_id=category_id,
-            author_id=author_id,
-            podcasts=paginated_podcasts,
+            podcast=details.podcast,
+            episodes=details.episodes.items,
+            reviews=details.reviews,
+            page=args['page'],
+            total_pages=details.episodes.total_pages,
+            catalogue_page=args['catalogue_page'],
+            search_title=args['search_title'],
+            category_id=args['category_id'],
+            author_id=args['author_id'],
             recently_added_episode=recently_added_episode,
             recently_added_podcast=recently_added_podcast,
-            av_rating=average_rating
+            av_rating=details.average_rating
         )
     else:
         return "Podcast not found", 404
@@ -92,6 +86,7 @@ def new_review(podcast_id):
     if form.validate_on_submit():
         try:
             review_services.add_review(int(podcast_id), username, str(form.comment.data), int(form.rating.data), repository)
+            home_services.invalidate_charts()
             return redirect(url_for('description_bp.description', podcast_id=podcast_id))
         except review_services.UnknownUserException:
             error_message = "User unknown"
@@ -129,6 +124,7 @@ def perform_episode_action(episode_id):
 
     if episode:
         repository.add_episode_to_playlist(episode, user)
+        home_services.invalidate_charts()
         repository.recently_added_episode_to_playlist(episode_id)
         return redirect(request.referrer or url_for('description_bp.description', podcast_id=episode.podcast.id))
     else:
@@ -145,6 +141,7 @@ def perform_podcast_action(podcast_id):
 
     if podcast:
         repository.add_podcast_to_playlist(podcast, user)
+        home_services.invalidate_charts()
         repository.recently_added_podcast_to_playlist(podcast_id)
         return redirect(request.referrer or url_for('description_bp.description', podcast_id=podcast_id))
     else:
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import sys
+
 
 def validate_non_negative_int(value):
     if not isinstance(value, int) or value < 0:
@@ -16,7 +18,7 @@ class Author:
         validate_non_negative_int(author_id)
         validate_non_empty_string(name, "Author name")
         self._id = author_id
-        self._name = name.strip()
+        self._name = sys.intern(name.strip())
         self.podcast_list = []
 
     @property
@@ -69,7 +71,7 @@ class Podcast:
         self._title = title.strip()
         self._image = image
         self._description = description
-        self._language = language
+        self._language = sys.intern(language) if isinstance(language, str) else language
         self._website = website
         self._itunes_id = itunes_id
         self.categories = []
@@ -187,7 +189,7 @@ class Category:
         validate_non_negative_int(category_id)
         validate_non_empty_string(name, "Category name")
         self._id = category_id
-        self._name = name.strip()
+        self._name = sys.intern(name.strip())
 
     @property
     def id(self) -> int:
@@ -366,7 +368,7 @@ class Episode:
         self._podcast = podcast
         self._title = title
         self._audio_length = audio_length
-        self._publication_date = publication_date[0:10]
+        self._publication_date = sys.intern(publication_date[0:10])
         self._description = description
         self._audio_link = audio_link
 
@@ -501,8 +503,10 @@ class Playlist:
         self._user = user
         self._title = title
         self._description = description
-        self._episodes = episodes
-        self._podcasts = podcasts
+        # Members are keyed by id: a dict iterates in insertion order like a list, and finds, dedupes and removes
+        # members in O(1).
+        self._episodes = {episode.id: episode for episode in episodes}
+        self._podcasts = {podcast.id: podcast for podcast in podcasts}
         # self._recently_added_episode = -1
         # self._recently_added_podcast = -1
 
@@ -539,12 +543,18 @@ class Playlist:
         return self._description
 
     @property
-    def episodes(self):
-        return self._episodes
+    def episodes(self) -> list[Episode]:
+        return list(self._episodes.values())
 
     @property
-    def podcasts(self):
-        return self._podcasts
+    def podcasts(self) -> list[Podcast]:
+        return list(self._podcasts.values())
+
+    def has_episode(self, episode: Episode) -> bool:
+        return isinstance(episode, Episode) and self._episodes.get(episode.id) == episode
+
+    def has_podcast(self, podcast: Podcast) -> bool:
+        return isinstance(podcast, Podcast) and self._podcasts.get(podcast.id) == podcast
 
     # @property
     # def recently_added_episode(self):
@@ -569,34 +579,35 @@ class Playlist:
     def add_episode(self, new_episode: Episode):
         if not isinstance(new_episode, Episode):
             raise TypeError("Episode must be a Episode object.")
-        self._episodes.append(new_episode)
+        # an episode already in the playlist keeps its place
+        self._episodes.setdefault(new_episode.id, new_episode)
 
     def add_podcast(self, new_podcast: Podcast):
         if not isinstance(new_podcast, Podcast):
             raise TypeError("Podcast must be a Podcast object.")
-        self._podcasts.append(new_podcast)
+        self._podcasts.setdefault(new_podcast.id, new_podcast)
 
     def merge_playlist(self, other_playlist: Playlist):
         if not isinstance(other_playlist, Playlist):
             raise TypeError("Playlist must be a Playlist object.")
-        self.episodes.extend(other_playlist.episodes)
-        self.podcasts.extend(other_playlist.podcasts)
+        for episode in other_playlist.episodes:
+            self._episodes.setdefault(episode.id, episode)
+        for podcast in other_playlist.podcasts:
+            self._podcasts.setdefault(podcast.id, podcast)
 
     def delete_episode(self, episode: Episode):
         if not isinstance(episode, Episode):
             raise TypeError("Episode must be a Episode object.")
-        try:
-            self.episodes.remove(episode)
-        except ValueError:
+        if not self.has_episode(episode):
             raise ValueError("Episode not in Playlist.")
+        del self._episodes[episode.id]
 
     def delete_podcast(self, podcast: Podcast):
         if not isinstance(podcast, Podcast):
             raise TypeError("Podcast must be a Podcast object.")
-        try:
-            self.podcasts.remove(podcast)
-        except ValueError:
+        if not self.has_podcast(podcast):
             raise ValueError("Podcast not in Playlist.")
+        del self._podcasts[podcast.id]
 
     def reassign_user(self, new_user: User):
         if not isinstance(new_user, User):
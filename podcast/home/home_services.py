@@ -0,0 +1,90 @@
+import threading
+import time
+
+from flask import current_app, render_template
+from markupsafe import Markup
+
+from podcast.domainmodel.model import Chart
+
+# Key of the charts cache in app.extensions, so every app (and every test app) has its own.
+CHARTS_CACHE = 'home_charts'
+
+
+class _ChartsEntry:
+    def __init__(self, repository, version, charts, fragment, expires):
+        self.repository = repository
+        self.version = version
+        self.charts = charts
+        self.fragment = fragment
+        self.expires = expires
+
+
+CHART_SIZE = 5
+
+
+def build_charts(repository) -> list[Chart]:
+    list_of_podcasts = list(repository.get_podcasts())
+    # Podcasts with recent review and playlist activity, topped up with the old fixed picks while there is
+    # too little activity to fill the chart.
+    trending = repository.get_trending_podcasts(CHART_SIZE)
+    for podcast in [list_of_podcasts[139], list_of_podcasts[1], list_of_podcasts[2], list_of_podcasts[3], list_of_podcasts[4]]:
+        if len(trending) >= CHART_SIZE:
+            break
+        if podcast not in trending:
+            trending.append(podcast)
+    chart_1 = Chart(1, "Trending Now", trending)
+    chart_2 = Chart(1, "Editor's Picks", [list_of_podcasts[93], list_of_podcasts[77], list_of_podcasts[2], list_of_podcasts[3], list_of_podcasts[4]])
+    return [chart_1, chart_2]
+
+
+def _charts_cache():
+    return current_app.extensions.setdefault(CHARTS_CACHE, {'lock': threading.Lock(), 'entry': None})
+
+
+def _fresh_entry(cache, repository):
+    entry = cache['entry']
+    if entry is not None and entry.repository is repository and time.monotonic() < entry.expires:
+        return entry
+    return None
+
+
+def _charts_entry(repository) -> _ChartsEntry:
+    cache = _charts_cache()
+    # A warm hit never touches the repository: writes in this process drop the entry (invalidate_charts), and
+    # the repository is only asked for its charts version once the entry has expired.
+    entry = _fresh_entry(cache, repository)
+    if entry is None:
+        with cache['lock']:
+            # another thread may have rebuilt the charts while this one waited
+            entry = _fresh_entry(cache, repository)
+            if entry is None:
+                ttl = current_app.config.get('HOME_CHARTS_TTL', 300)
+                version = repository.get_charts_version()
+                entry = cache['entry']
+                if ttl > 0 and entry is not None and entry.repository is repository and entry.version == version:
+                    # nothing has changed since the charts were built, in this worker or any other
+                    entry.expires = time.monotonic() + ttl
+                else:
+                    charts = build_charts(repository)
+                    fragment = Markup(render_template('charts.html', charts=charts))
+                    entry = _ChartsEntry(repository, version, charts, fragment, time.monotonic() + ttl)
+                    cache['entry'] = entry
+    return entry
+
+
+def invalidate_charts():
+    """Drops the cached charts, so that the next home page hit rebuilds them. Views call it after a review or
+    playlist add; other workers pick the change up when their entry expires."""
+    _charts_cache()['entry'] = None
+
+
+def get_charts(repository) -> list[Chart]:
+    """Returns the home page charts, rebuilt after invalidate_charts() and, once HOME_CHARTS_TTL seconds have
+    passed, if the repository's charts version has changed."""
+    return _charts_entry(repository).charts
+
+
+def get_charts_fragment(repository) -> Markup:
+    """Returns the rendered HTML of the home page charts, cached alongside the charts themselves."""
+    return _charts_entry(repository).fragment
+
@@ -3,39 +3,46 @@ from podcast.adapters import repository as repo
 
 podcasts_blueprint = Blueprint('podcasts_bp', __name__)
 
+def _catalogue_arguments():
+    return {
+        'search_title': request.args.get('search_title'),
+        'category_id': request.args.get('category'),
+        'author_id': request.args.get('author'),
+        'title_id': request.args.get('title'),
+    }
+
+
 @podcasts_blueprint.route('/podcasts', methods=['GET'])
 def podcasts():
     page = request.args.get('page', 1, type=int)
     per_page = 24
-    search_title = request.args.get('search_title')
-    category_id = request.args.get('category')
-    author_id = request.args.get('author')
-    title_id = request.args.get('title')
 
     repository = repo.repo_instance
 
-    if search_title:
-        list_of_podcasts = repository.search_podcasts_by_query(search_title)
-    elif title_id:
-        list_of_podcasts = [repository.get_podcast(int(title_id))]
-    elif category_id:
-        list_of_podcasts = repository.search_podcast_by_category_id(category_id)
-    elif author_id:
-        list_of_podcasts = repository.search_podcast_by_author_id(author_id)
-    else:
-        list_of_podcasts = repository.get_podcasts()
-    if not list_of_podcasts:
+    podcasts_page = repository.get_podcasts_page(page, per_page, **_catalogue_arguments())
+    return _render_catalogue(podcasts_page, page)
+
+
+async def podcasts_async():
+    """podcasts() on the async repository, whose page query and count run concurrently. create_app serves the
+    catalogue with this when ASYNC_VIEWS is set."""
+    page = request.args.get('page', 1, type=int)
+    per_page = 24
+
+    podcasts_page = await repo.async_repo_instance.get_podcasts_page(page, per_page, **_catalogue_arguments())
+    return _render_catalogue(podcasts_page, page)
+
+
+def _render_catalogue(podcasts_page, page):
+    if podcasts_page.total == 0:
         return render_template('catalogue.html', no_podcasts_found=True)
 
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated_podcasts = list_of_podcasts[start:end]
-    total_podcasts = len(list_of_podcasts)
-    total_pages = (total_podcasts + per_page - 1) // per_page
+    paginated_podcasts = podcasts_page.items
+    total_podcasts = podcasts_page.total
+    total_pages = podcasts_page.total_pages
 
-    categories = repository.get_categories()
-    authors = repository.get_authors()
-    unique_podcasts = list(set(repository.get_podcasts()))
+    # cached by the repository, so this rarely touches the database
+    sidebar = repo.repo_instance.get_catalogue_sidebar()
 
     no_podcasts_found = total_podcasts == 0
 
@@ -43,7 +50,7 @@ def podcasts():
                            podcasts=paginated_podcasts,
                            page=page,
                            total_pages=total_pages,
-                           categories=categories,
-                           authors=authors,
-                           unique_podcasts=unique_podcasts,
+                           categories=sidebar.categories,
+                           authors=sidebar.authors,
+                           unique_podcasts=sidebar.podcasts,
                            no_podcasts_found=no_podcasts_found)
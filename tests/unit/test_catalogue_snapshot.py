@@ -0,0 +1,60 @@
+import shutil
+
+import pytest
+from podcast.adapters.datareader.csvdatareader import CSVDataReader
+from podcast.adapters.service import catalogue_snapshot
+from podcast.adapters.service.catalogue_snapshot import load_data_with_snapshot, load_snapshot, snapshot_key
+from podcast.adapters.service.memory_repository import MemoryRepository
+
+
+@pytest.fixture
+def csv_reader(tmp_path):
+    shutil.copy('podcast/adapters/data/podcasts-mini.csv', tmp_path / 'podcasts.csv')
+    shutil.copy('podcast/adapters/data/episodes-mini.csv', tmp_path / 'episodes.csv')
+    return CSVDataReader(str(tmp_path / 'podcasts.csv'), str(tmp_path / 'episodes.csv'))
+
+
+def test_snapshot_written_then_loaded(csv_reader, tmp_path):  # tests the first boot builds the snapshot and the next one loads it
+    snapshot_path = str(tmp_path / 'catalogue.snapshot')
+    first = MemoryRepository()
+    assert load_data_with_snapshot(first, csv_reader, snapshot_path) is False
+
+    second = MemoryRepository()
+    assert load_data_with_snapshot(second, csv_reader, snapshot_path) is True
+    assert second.podcasts == first.podcasts
+    assert second.episodes == first.episodes
+    assert second.categories == first.categories
+    assert second.get_podcast(140).episodes[0].podcast is second.get_podcast(140)
+    assert second.search_podcasts_by_query('uanaC') == [second.get_podcast(140)]
+
+
+def test_snapshot_rebuilt_when_csv_changes(csv_reader, tmp_path):  # tests a stale snapshot is ignored and replaced
+    snapshot_path = str(tmp_path / 'catalogue.snapshot')
+    load_data_with_snapshot(MemoryRepository(), csv_reader, snapshot_path)
+    old_key = snapshot_key(csv_reader)
+
+    with open(csv_reader.episodes_file) as file:
+        lines = file.readlines()
+    with open(csv_reader.episodes_file, 'w') as file:
+        file.writelines(lines[:-1])
+
+    assert load_snapshot(snapshot_path, snapshot_key(csv_reader)) is None
+    repository = MemoryRepository()
+    assert load_data_with_snapshot(repository, csv_reader, snapshot_path) is False
+    assert len(repository.episodes) == 10
+    assert load_snapshot(snapshot_path, old_key) is None
+
+
+def test_snapshot_version_mismatch(csv_reader, tmp_path, monkeypatch):  # tests snapshots from another format version are not loaded
+    snapshot_path = str(tmp_path / 'catalogue.snapshot')
+    load_data_with_snapshot(MemoryRepository(), csv_reader, snapshot_path)
+    monkeypatch.setattr(catalogue_snapshot, 'SNAPSHOT_VERSION', catalogue_snapshot.SNAPSHOT_VERSION + 1)
+    assert load_data_with_snapshot(MemoryRepository(), csv_reader, snapshot_path) is False
+
+
+def test_corrupt_snapshot_ignored(csv_reader, tmp_path):  # tests an unreadable snapshot falls back to the csv files
+    snapshot_path = tmp_path / 'catalogue.snapshot'
+    snapshot_path.write_bytes(b'not a snapshot')
+    repository = MemoryRepository()
+    assert load_data_with_snapshot(repository, csv_reader, str(snapshot_path)) is False
+    assert len(repository.podcasts) == 7
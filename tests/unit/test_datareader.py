@@ -39,3 +39,28 @@ def test_get_episodes():  # tests CSVDataReader's get_episodes() method
     assert episodes[0]['audio_length'] == '985'
     assert episodes[0]['description'] == 'Trans-dimensional, experiential, nonreligious life in the Jesus way.'
     assert episodes[0]['pub_date'] == '2017-12-15 08:23:10+00'
+
+
+def test_iter_podcasts():  # tests CSVDataReader's iter_podcasts() generator yields typed rows
+    reader = CSVDataReader('podcast/adapters/data/podcasts-mini.csv', 'podcast/adapters/data/episodes-mini.csv')
+    podcasts = reader.iter_podcasts()
+    assert not isinstance(podcasts, list)
+
+    podcasts = list(podcasts)
+    assert len(podcasts) == 7
+    assert podcasts[0]['id'] == 748
+    assert podcasts[0]['itunes_id'] == 1155980634
+    assert podcasts[0]['categories'] == ['TV & Film']
+    assert podcasts[0]['author'] == "Dueling Genre Productions"
+    assert all(isinstance(row['categories'], list) for row in podcasts)
+
+
+def test_iter_episodes():  # tests CSVDataReader's iter_episodes() generator yields typed rows
+    reader = CSVDataReader('podcast/adapters/data/podcasts-mini.csv', 'podcast/adapters/data/episodes-mini.csv')
+    episodes = list(reader.iter_episodes())
+
+    assert len(episodes) == 11
+    assert episodes[0]['id'] == 3385
+    assert episodes[0]['podcast_id'] == 140
+    assert episodes[0]['audio_length'] == 985
+    assert episodes[0]['pub_date'] == '2017-12-15 08:23:10+00'
@@ -206,6 +206,18 @@ def test_podcast_initialization():
     assert podcast4.image is None
 
 
+def test_catalogue_strings_are_shared():  # Tests that repeated languages and names are interned
+    import pickle
+    author = Author(1, "Doctor Squee")
+    podcast = Podcast(2, author, "My First Podcast", language="English")
+    other_podcast = Podcast(3, author, "My Second Podcast", language="".join(["Eng", "lish"]))
+    assert podcast.language is other_podcast.language
+    assert Category(1, "".join(["Com", "edy"])).name is Category(2, "Comedy").name
+    copy = pickle.loads(pickle.dumps(podcast))
+    assert copy == podcast
+    assert copy.title == podcast.title
+    assert copy.author.name == "Doctor Squee"
+
 def test_podcast_change_title(my_podcast):
     my_podcast.title = "TourMix Podcast"
     assert my_podcast.title == "TourMix Podcast"
@@ -581,6 +593,20 @@ def test_playlist_add_episode(my_playlist_empty, my_episode):  # Tests the playl
     assert str(exc_info.value) == "Episode must be a Episode object."
 
 
+def test_playlist_keeps_one_of_each_member_in_order(my_playlist_empty, my_episode, my_episode_2, my_podcast):  # Tests playlists ignore repeated adds and keep insertion order
+    my_playlist_empty.add_episode(my_episode_2)
+    my_playlist_empty.add_episode(my_episode)
+    my_playlist_empty.add_episode(my_episode_2)
+    my_playlist_empty.add_podcast(my_podcast)
+    my_playlist_empty.add_podcast(my_podcast)
+    assert my_playlist_empty.episodes == [my_episode_2, my_episode]
+    assert my_playlist_empty.podcasts == [my_podcast]
+    assert my_playlist_empty.has_episode(my_episode)
+    my_playlist_empty.delete_episode(my_episode_2)
+    assert not my_playlist_empty.has_episode(my_episode_2)
+    assert my_playlist_empty.episodes == [my_episode]
+
+
 def test_playlist_add_podcast(my_playlist_empty, my_podcast):  # Tests the playlist add_podcast method
     my_playlist_empty.add_podcast(my_podcast)
     assert my_playlist_empty.podcasts[0] == my_podcast
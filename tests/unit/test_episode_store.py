@@ -0,0 +1,74 @@
+import pickle
+import sys
+import threading
+
+from podcast.adapters.service.episode_store import EpisodeTextStore, StoredEpisode
+from podcast.domainmodel.model import Author, Episode, Podcast
+
+
+def test_text_round_trip():  # tests that stored text reads back unchanged, including non-ascii text
+    store = EpisodeTextStore()
+    first = store.append("A description", "http://example.com/1.mp3")
+    second = store.append("Ünïcödé — ✓", "")
+    assert (first, second) == (0, 1)
+    assert len(store) == 2
+    assert store.text(first, 0) == "A description"
+    assert store.text(first, 1) == "http://example.com/1.mp3"
+    assert store.text(second, 0) == "Ünïcödé — ✓"
+    assert store.text(second, 1) == ""
+    third = store.append("Appended after reading", "link")  # the mapping grows with the file
+    assert store.text(third, 0) == "Appended after reading"
+
+
+def test_concurrent_first_reads():  # tests that threads reading a freshly grown store never see a closed mapping
+    errors = []
+
+    def read(store, start):
+        start.wait()
+        try:
+            for i in range(0, 200, 3):
+                assert store.text(i, 0) == f"description {i}"
+                assert store.text(i, 1) == f"link {i}"
+        except Exception as error:
+            errors.append(error)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible to shake out races
+    try:
+        for _ in range(300):
+            store = EpisodeTextStore()
+            for i in range(200):
+                store.append(f"description {i}", f"link {i}")
+            start = threading.Barrier(8)
+            threads = [threading.Thread(target=read, args=(store, start)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert errors == []
+
+
+def test_store_pickles_with_its_text():  # tests that catalogue snapshots carry the stored text
+    store = EpisodeTextStore()
+    index = store.append("Description", "link")
+    copy = pickle.loads(pickle.dumps(store))
+    assert copy.text(index, 0) == "Description"
+    assert copy.text(index, 1) == "link"
+
+
+def test_stored_episode():  # tests that a StoredEpisode behaves like an Episode holding its text
+    podcast = Podcast(1, Author(1, "Author"), "Podcast")
+    store = EpisodeTextStore()
+    episode = StoredEpisode(1, podcast, "Title", 60, "2017-12-01 10:00:00+00", store,
+                            store.append("Long description", "http://example.com/1.mp3"))
+    assert episode == Episode(1, podcast, "Title", 60, "2017-12-01", "Long description", "http://example.com/1.mp3")
+    assert episode.publication_date == "2017-12-01"
+    assert episode.description == "Long description"
+    assert episode.audio_link == "http://example.com/1.mp3"
+    episode.description = "Edited"
+    assert episode.description == "Edited"
+    copy = pickle.loads(pickle.dumps(episode))
+    assert copy.audio_link == "http://example.com/1.mp3"
+    assert copy.description == "Edited"
@@ -0,0 +1,52 @@
+import gc
+import runpy
+
+from utils import get_project_root
+
+
+class FakeEngine:
+    def __init__(self):
+        self.disposed = None
+
+    def dispose(self, close=True):
+        self.disposed = close
+
+
+class FakeApp:
+    def __init__(self, extensions):
+        self.extensions = extensions
+
+    def wsgi(self):
+        return self
+
+
+class FakeServer:
+    def __init__(self, extensions):
+        self.app = FakeApp(extensions)
+
+
+def load_config():
+    return runpy.run_path(str(get_project_root() / 'gunicorn.conf.py'))
+
+
+def test_app_is_preloaded():  # tests that the app is built once in the master process
+    config = load_config()
+    assert config['preload_app'] is True
+    assert config['wsgi_app'] == 'wsgi:app'
+
+
+def test_when_ready_freezes_the_master_heap():  # tests that the master's objects are moved out of the collector's reach
+    config = load_config()
+    try:
+        config['when_ready'](FakeServer({}))
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+
+def test_post_fork_drops_inherited_connections():  # tests that workers do not reuse the master's pooled connections
+    config = load_config()
+    engine = FakeEngine()
+    config['post_fork'](FakeServer({'database_engine': engine}), None)
+    assert engine.disposed is False
+    config['post_fork'](FakeServer({}), None)
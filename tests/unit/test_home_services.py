@@ -0,0 +1,111 @@
+import pytest
+from flask import Flask
+
+from podcast.adapters.datareader.csvdatareader import CSVDataReader
+from podcast.adapters.service.memory_repository import MemoryRepository
+from podcast.description.description import description_blueprint
+from podcast.domainmodel.model import User
+from podcast.home import home_services
+
+
+class CountingRepository:
+    def __init__(self, repository):
+        self.repository = repository
+        self.calls = 0
+        self.version_calls = 0
+
+    def get_podcasts(self):
+        self.calls += 1
+        return self.repository.get_podcasts()
+
+    def get_trending_podcasts(self, n):
+        return self.repository.get_trending_podcasts(n)
+
+    def get_charts_version(self):
+        self.version_calls += 1
+        return self.repository.get_charts_version()
+
+
+@pytest.fixture(scope='module')
+def full_repo():
+    # the charts pick fixed positions from the full catalogue
+    repository = MemoryRepository()
+    repository.load_data(CSVDataReader('podcast/adapters/data/podcasts.csv', 'podcast/adapters/data/episodes.csv'))
+    return repository
+
+
+@pytest.fixture
+def app():
+    app = Flask('podcast')
+    app.register_blueprint(description_blueprint)
+    app.config['HOME_CHARTS_TTL'] = 300
+    return app
+
+
+def test_charts_are_cached(app, full_repo):  # tests that the charts and their HTML are built once per TTL
+    repository = CountingRepository(full_repo)
+    with app.test_request_context('/'):
+        charts = home_services.get_charts(repository)
+        assert [chart.title for chart in charts] == ["Trending Now", "Editor's Picks"]
+        fragment = home_services.get_charts_fragment(repository)
+        assert charts[0].podcasts[0].title in fragment
+        assert home_services.get_charts_fragment(repository) is fragment
+        assert repository.calls == 1
+        assert repository.version_calls == 1  # warm hits do not touch the repository at all
+
+
+def test_activity_rebuilds_charts(app, full_repo):  # tests that invalidate_charts() makes the next request rebuild the charts
+    repository = CountingRepository(full_repo)
+    user = User(0, "listener", "Password123")
+    full_repo.add_user(user)
+    full_repo.create_playlist(user)
+    with app.test_request_context('/'):
+        home_services.get_charts_fragment(repository)
+        full_repo.add_podcast_to_playlist(full_repo.get_podcasts()[10], user)
+        home_services.invalidate_charts()  # as the views do after a review or playlist add
+        fragment = home_services.get_charts_fragment(repository)
+        assert repository.calls == 2
+        assert full_repo.get_podcasts()[10].title in fragment
+        home_services.get_charts_fragment(repository)
+        assert repository.calls == 2
+
+
+def test_expired_charts_check_the_version(app, full_repo):  # tests that an expired entry is only rebuilt if the repository changed, e.g. in another worker
+    repository = CountingRepository(full_repo)
+    user = User(0, "curator", "Password123")
+    full_repo.add_user(user)
+    full_repo.create_playlist(user)
+    with app.test_request_context('/'):
+        home_services.get_charts_fragment(repository)
+        app.extensions[home_services.CHARTS_CACHE]['entry'].expires = 0
+        home_services.get_charts_fragment(repository)
+        assert repository.calls == 1
+        assert repository.version_calls == 2
+        full_repo.add_podcast_to_playlist(full_repo.get_podcasts()[20], user)  # not invalidated here
+        assert full_repo.get_podcasts()[20].title not in home_services.get_charts_fragment(repository)
+        app.extensions[home_services.CHARTS_CACHE]['entry'].expires = 0
+        assert full_repo.get_podcasts()[20].title in home_services.get_charts_fragment(repository)
+        assert repository.calls == 2
+
+
+def test_charts_ttl(app, full_repo):  # tests that a TTL of 0 turns the cache off
+    app.config['HOME_CHARTS_TTL'] = 0
+    repository = CountingRepository(full_repo)
+    with app.test_request_context('/'):
+        home_services.get_charts_fragment(repository)
+        home_services.get_charts_fragment(repository)
+        assert repository.calls == 2
+
+
+def test_trending_chart(app):  # tests that podcasts with recent activity lead the trending chart
+    repository = MemoryRepository()
+    repository.load_data(CSVDataReader('podcast/adapters/data/podcasts.csv', 'podcast/adapters/data/episodes.csv'))
+    active_podcast = repository.get_podcasts()[500]
+    user = User(0, "listener", "Password123")
+    repository.add_user(user)
+    repository.create_playlist(user)
+    repository.add_podcast_to_playlist(active_podcast, user)
+    with app.test_request_context('/'):
+        trending = home_services.get_charts(repository)[0]
+        assert trending.podcasts[0] == active_podcast
+        assert len(trending.podcasts) == home_services.CHART_SIZE
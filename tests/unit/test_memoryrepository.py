@@ -101,6 +101,8 @@ def test_create_episode(my_repository, csv_reader, temp_podcast, temp_episode):
     episodes_data = my_repository.csv_reader.get_episodes()
     created_episode = my_repository._create_episode(episodes_data[0])
     assert created_episode == temp_episode
+    assert created_episode.description == temp_episode.description
+    assert created_episode.audio_link == temp_episode.audio_link
 
 
 def test_create_category(my_repository, csv_reader):  # tests the MemoryRepository's create_category() method
@@ -123,6 +125,13 @@ def test_get_podcast(my_repository, csv_reader, temp_podcast):  # tests the Memo
     assert got_podcast == temp_podcast
 
 
+def test_get_podcast_unknown_id(my_repository, csv_reader):  # tests get_podcast() lookups that miss the id index
+    my_repository.load_data(csv_reader)
+    assert my_repository.get_podcast(999999) is None
+    assert my_repository.get_podcast('140').id == 140
+    assert my_repository.get_episode(999999) is None
+
+
 def test_get_episode(my_repository, csv_reader, temp_episode):  # tests the MemoryRepository's get_episode() method
     my_repository.load_data(csv_reader)
     got_episode = my_repository.get_episode(3385)
@@ -156,6 +165,66 @@ def test_search_podcast_by_category_id(my_repository, csv_reader, temp_podcast):
     assert podcasts_in_category == []
 
 
+def test_category_and_author_filters_keep_catalogue_order(my_repository, csv_reader):  # tests the MemoryRepository's category and author indexes
+    my_repository.load_data(csv_reader)
+    podcasts = my_repository.get_podcasts()
+    for category in my_repository.get_categories():
+        expected = [podcast for podcast in podcasts if category in podcast.categories]
+        assert my_repository.search_podcast_by_category_id(category.id) == expected
+    for author in my_repository.get_authors():
+        expected = [podcast for podcast in podcasts if podcast.author.id == author.id]
+        assert my_repository.search_podcast_by_author_id(author.id) == expected
+
+
+def test_get_catalogue_sidebar(my_repository, csv_reader):  # tests the MemoryRepository's get_catalogue_sidebar() method
+    my_repository.load_data(csv_reader)
+    sidebar = my_repository.get_catalogue_sidebar()
+    assert [category.name for category in sidebar.categories] == [category.name for category in my_repository.get_categories()]
+    assert [author.name for author in sidebar.authors] == sorted(author.name for author in my_repository.get_authors())
+    assert [podcast.title for podcast in sidebar.podcasts] == sorted(podcast.title for podcast in my_repository.get_podcasts())
+    assert my_repository.get_catalogue_sidebar() is sidebar
+    my_repository.load_data(csv_reader)
+    reloaded = my_repository.get_catalogue_sidebar()
+    assert reloaded is not sidebar
+    assert reloaded.version > sidebar.version
+    assert reloaded.podcasts == sidebar.podcasts
+
+
+def test_get_podcasts_page(my_repository, csv_reader, temp_podcast):  # tests the MemoryRepository's get_podcasts_page() method
+    my_repository.load_data(csv_reader)
+    podcasts = my_repository.get_podcasts()
+    first_page = my_repository.get_podcasts_page(1, 3)
+    assert first_page.items == podcasts[0:3]
+    assert first_page.total == len(podcasts)
+    assert first_page.total_pages == (len(podcasts) + 2) // 3
+    assert my_repository.get_podcasts_page(2, 3).items == podcasts[3:6]
+    assert my_repository.get_podcasts_page(100, 3).items == []
+    assert my_repository.get_podcasts_page(1, 3, category_id='6').items == my_repository.search_podcast_by_category_id('6')
+    assert my_repository.get_podcasts_page(1, 3, author_id='7').items == [temp_podcast]
+    assert my_repository.get_podcasts_page(1, 3, title_id='140').items == [temp_podcast]
+    assert my_repository.get_podcasts_page(1, 3, title_id='100000').total == 0
+    assert my_repository.get_podcasts_page(1, 3, search_title='marijuana').items == [temp_podcast]
+
+
+def test_get_episodes_page_by_podcast_id(my_repository, csv_reader):  # tests the MemoryRepository's get_episodes_page_by_podcast_id() method
+    my_repository.load_data(csv_reader)
+    episodes = my_repository.get_episodes_by_podcast_id(243)
+    episodes_page = my_repository.get_episodes_page_by_podcast_id(243, 2, 3)
+    assert episodes_page.items == episodes[3:4]
+    assert episodes_page.total == len(episodes) == 4
+    assert my_repository.get_episodes_page_by_podcast_id(100000, 1, 3).total == 0
+
+
+def test_get_podcast_details(my_repository, csv_reader):  # tests the MemoryRepository's get_podcast_details() method
+    my_repository.load_data(csv_reader)
+    details = my_repository.get_podcast_details(243, 2, 3)
+    assert details.podcast == my_repository.get_podcast(243)
+    assert details.episodes == my_repository.get_episodes_page_by_podcast_id(243, 2, 3)
+    assert details.reviews == []
+    assert details.average_rating == 'No ratings yet!'
+    assert my_repository.get_podcast_details(100000, 1, 3) is None
+
+
 def test_get_authors(my_repository, csv_reader):  # tests the MemoryRepository's get_authors() method
     my_repository.load_data(csv_reader)
     authors = my_repository.get_authors()
@@ -218,6 +287,37 @@ def test_get_user(my_repository, csv_reader):  # tests the MemoryRepository's ge
     assert my_repository.users == [User(0, "User", "password"), User(1, "User2", "password2")]
 
 
+def test_get_user_case_insensitive(my_repository, csv_reader):  # tests get_user() against the username index
+    my_repository.load_data(csv_reader)
+    my_repository.add_user(User(0, "User", "password"))
+    assert my_repository.get_user("USER") == User(0, "User", "password")
+    assert my_repository.get_user("nobody") is None
+    my_repository.users = [User(3, "Replaced", "password")]
+    assert my_repository.get_user("replaced") == User(3, "Replaced", "password")
+    assert my_repository.get_user("User") is None
+
+
+def test_users_cannot_bypass_add_user(my_repository, csv_reader):  # tests users can only be stored through add_user, which indexes them by username
+    my_repository.load_data(csv_reader)
+    with pytest.raises(AttributeError):
+        my_repository.users.append(User(0, "User", "password"))
+    assert my_repository.get_user("User") is None
+    users = [User(0, "User", "password")]
+    my_repository.users = users
+    users.append(User(1, "User2", "password2"))
+    assert my_repository.get_all_users() == [User(0, "User", "password")]
+    assert my_repository.get_user("User2") is None
+
+
+def test_users_are_a_view(my_repository, csv_reader):  # tests users reads the stored list rather than copying it
+    my_repository.add_user(User(0, "User", "password"))
+    users = my_repository.users
+    my_repository.add_user(User(1, "User2", "password2"))
+    assert users == [User(0, "User", "password"), User(1, "User2", "password2")]
+    assert users[1] == User(1, "User2", "password2")
+    assert len(users) == 2
+
+
 def test_get_all_users(my_repository, csv_reader):  # tests the MemoryRepository's get_all_users() method
     my_repository.load_data(csv_reader)
     my_repository.add_user(User(0, "User", "password"))
@@ -228,10 +328,35 @@ def test_get_all_users(my_repository, csv_reader):  # tests the MemoryRepository
 def test_get_user_reviews(my_repository, csv_reader, temp_podcast, temp_review):  # tests the MemoryRepository's get_user_reviews() method
     my_repository.load_data(csv_reader)
     temp_user = User(1, "name", "pASSword12345")
-    my_repository.users.append(temp_user)
+    my_repository.add_user(temp_user)
     assert my_repository.get_user_reviews(temp_user.username) == []
-    my_repository.reviews.append(temp_review)
+    my_repository.add_review(temp_review)
     assert my_repository.get_user_reviews(temp_user.username) == [temp_review]
+    assert my_repository.get_user_reviews(temp_user.username.upper()) == [temp_review]
+    assert my_repository.get_user_reviews("someone else") == []
+
+
+def test_get_user_reviews_page(my_repository, csv_reader, temp_podcast, temp_user):  # tests the MemoryRepository's get_user_reviews_page() method
+    my_repository.load_data(csv_reader)
+    reviews = [Review(review_id, 3, "fine", temp_user, temp_podcast) for review_id in range(5)]
+    for review in reviews:
+        my_repository.add_review(review)
+    my_repository.add_review(Review(5, 1, "no", User(2, "someone else", "Password1"), temp_podcast))
+    reviews_page = my_repository.get_user_reviews_page(temp_user.username.upper(), 2, 2)
+    assert reviews_page.items == reviews[2:4]
+    assert reviews_page.total == 5
+    assert my_repository.get_user_reviews_page("nobody", 1, 2).total == 0
+
+
+def test_reviews_cannot_bypass_add_review(my_repository, csv_reader, temp_review):  # tests reviews can only be stored through add_review, which indexes them
+    my_repository.load_data(csv_reader)
+    with pytest.raises(AttributeError):
+        my_repository.reviews.append(temp_review)
+    assert my_repository.get_user_reviews(temp_review.user.username) == []
+    assert my_repository.get_reviews_by_podcast(temp_review.podcast.id) == []
+    my_repository.reviews = [temp_review]
+    assert my_repository.get_user_reviews(temp_review.user.username) == [temp_review]
+    assert my_repository.get_reviews_by_podcast(temp_review.podcast.id) == [temp_review]
 
 
 def test_add_review(my_repository, csv_reader, temp_review):  # tests the MemoryRepository's add_review() method
@@ -263,6 +388,11 @@ def test_get_reviews_by_podcast(my_repository, csv_reader, temp_podcast, temp_re
     my_repository.add_review(temp_review)
     assert my_repository.get_reviews_by_podcast(temp_podcast.id) == [temp_review]
     assert my_repository.get_reviews_by_podcast(718) == []
+    other_podcast = my_repository.get_podcasts()[0]
+    other_review = Review(6, 2, "not for me", User(2, "name2", "pASSword123456"), other_podcast)
+    my_repository.add_review(other_review)
+    assert my_repository.get_reviews_by_podcast(temp_podcast.id) == [temp_review]
+    assert my_repository.get_reviews_by_podcast(other_podcast.id) == [other_review]
 
 
 def test_create_playlist(my_repository, csv_reader, temp_user):  # tests the MemoryRepository's create_playlist() method
@@ -279,6 +409,45 @@ def test_get_playlist(my_repository, csv_reader, temp_user):  # tests the Memory
     assert my_repository.get_playlist(temp_user) == Playlist(0, temp_user, temp_user.username + "'s Playlist", "Save episodes and whole playlists to watch later!", [], [])
 
 
+def test_get_playlist_summary(my_repository, csv_reader, temp_user):  # tests get_playlist_summary() returns the user's playlist
+    my_repository.create_playlist(temp_user)
+    assert my_repository.get_playlist_summary(temp_user) is my_repository.get_playlist(temp_user)
+    with pytest.raises(ValueError):
+        my_repository.get_playlist_summary(User(999, "nobody", "Password1"))
+
+
+def test_playlists_are_kept_per_user(my_repository, csv_reader, temp_user):  # tests each user gets their own playlist
+    my_repository.load_data(csv_reader)
+    other_user = User(7, 'other', 'Password1')
+    my_repository.create_playlist(temp_user)
+    my_repository.create_playlist(other_user)
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(243), other_user)
+    assert my_repository.get_playlist(temp_user).podcasts == []
+    assert my_repository.get_playlist(other_user).podcasts == [my_repository.get_podcast(243)]
+    assert my_repository.get_playlist(other_user).title == "other's Playlist"
+
+
+def test_get_playlist_pages(my_repository, csv_reader, temp_user):  # tests playlist pages keep the order members were added in
+    my_repository.load_data(csv_reader)
+    my_repository.create_playlist(temp_user)
+    episodes = sorted(my_repository.get_episodes_by_podcast_id(243), key=lambda episode: episode.id)
+    added = [episodes[2], episodes[0], episodes[3], episodes[1]]
+    for episode in added:
+        my_repository.add_episode_to_playlist(episode, temp_user)
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(718), temp_user)
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(243), temp_user)
+    assert my_repository.get_playlist_episodes_page(temp_user, 1, 3).items == added[0:3]
+    episodes_page = my_repository.get_playlist_episodes_page(temp_user, 2, 3)
+    assert episodes_page.items == added[3:4]
+    assert episodes_page.total == 4
+    assert episodes_page.total_pages == 2
+    podcasts_page = my_repository.get_playlist_podcasts_page(temp_user, 1, 1)
+    assert podcasts_page.items == [my_repository.get_podcast(718)]
+    assert podcasts_page.total == 2
+    with pytest.raises(ValueError):
+        my_repository.get_playlist_episodes_page(User(999, 'nobody', 'Password1'), 1, 3)
+
+
 def test_add_episode_to_playlist(my_repository, csv_reader, temp_episode, temp_podcast, temp_user):  # tests the MemoryRepository's add_episode_to_playlist() method
     my_repository.load_data(csv_reader)
     with pytest.raises(ValueError) as exc_info:
@@ -305,6 +474,34 @@ def test_add_podcast_to_playlist(my_repository, csv_reader, temp_episode, temp_p
     assert str(exc_info.value) == "Podcast must be a Podcast object."
 
 
+def test_get_trending_podcasts(my_repository, csv_reader, temp_podcast, temp_review, temp_user):  # tests the MemoryRepository's get_trending_podcasts() method
+    my_repository.load_data(csv_reader)
+    assert my_repository.get_trending_podcasts(5) == []
+    other_podcast = my_repository.get_podcast(243)
+    my_repository.create_playlist(temp_user)
+    my_repository.add_episode_to_playlist(other_podcast.episodes[0], temp_user)
+    assert my_repository.get_trending_podcasts(5) == [other_podcast]
+    my_repository.add_review(temp_review)
+    assert my_repository.get_trending_podcasts(5) == [temp_podcast, other_podcast]
+    assert my_repository.get_trending_podcasts(1) == [temp_podcast]
+
+
+def test_repeated_playlist_adds_do_not_trend(my_repository, csv_reader, temp_user):  # tests a duplicate add leaves the trending scores unchanged
+    my_repository.load_data(csv_reader)
+    my_repository.create_playlist(temp_user)
+    podcast = my_repository.get_podcast(243)
+    episode = podcast.episodes[0]
+    my_repository.add_podcast_to_playlist(podcast, temp_user)
+    my_repository.add_episode_to_playlist(episode, temp_user)
+    my_repository.add_episode_to_playlist(episode, temp_user)
+    scores = dict(my_repository._trending._scores)
+    version = my_repository.get_charts_version()
+    my_repository.add_podcast_to_playlist(podcast, temp_user)
+    my_repository.add_episode_to_playlist(episode, temp_user)
+    assert my_repository._trending._scores == scores
+    assert my_repository.get_charts_version() == version
+
+
 def test_delete_episode_from_playlist(my_repository, csv_reader, temp_episode, temp_podcast, temp_user):  # tests the MemoryRepository's delete_episode_from_playlist() method
     my_repository.load_data(csv_reader)
     my_repository.create_playlist(temp_user)
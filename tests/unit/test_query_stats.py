@@ -0,0 +1,72 @@
+import pytest
+from flask import Flask, g
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from podcast.adapters.query_stats import QueryStats, init_query_stats
+
+
+def test_query_stats_keep_the_slowest_statements():  # tests the count, total time and slowest statements kept
+    stats = QueryStats(slowest_kept=2)
+    stats.record('SELECT 1', 0.001)
+    stats.record('SELECT 2', 0.004)
+    stats.record('SELECT 3', 0.002)
+    assert stats.count == 3
+    assert round(stats.total_time, 6) == 0.007
+    assert stats.slowest == [(0.004, 'SELECT 2'), (0.002, 'SELECT 3')]
+    assert stats.as_dict()['slowest'][0] == {'ms': 4.0, 'statement': 'SELECT 2'}
+
+
+def test_requests_report_their_queries():  # tests the response headers and the debug endpoint
+    engine = create_engine('sqlite://')
+    app = Flask(__name__)
+    app.config['QUERY_STATS_ENDPOINT'] = True
+    init_query_stats(app, engine)
+
+    @app.route('/two')
+    def two_queries():
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            connection.execute(text('SELECT 2'))
+        return str(g.query_stats.count)
+
+    client = app.test_client()
+    response = client.get('/two')
+    assert response.headers['X-Query-Count'] == '2'
+    assert response.headers['X-Query-Time'].endswith('ms')
+
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 3'))  # outside any request, so not counted
+
+    recent = client.get('/debug/queries').get_json()
+    assert len(recent) == 1
+    assert recent[0]['path'] == '/two'
+    assert recent[0]['count'] == 2
+    assert {entry['statement'] for entry in recent[0]['slowest']} == {'SELECT 1', 'SELECT 2'}
+
+
+def test_failed_statements_leave_no_timing_state():  # tests a statement that raises leaves nothing on its connection and is not counted
+    engine = create_engine('sqlite://')
+    app = Flask(__name__)
+    init_query_stats(app, engine)
+
+    @app.route('/failing')
+    def failing_query():
+        with engine.connect() as connection:
+            info_before = dict(connection.info)
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text('SELECT * FROM no_such_table'))
+            connection.execute(text('SELECT 1'))
+            assert connection.info == info_before
+        return str(g.query_stats.count)
+
+    response = app.test_client().get('/failing')
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '1'
+
+
+def test_debug_endpoint_is_off_by_default():  # tests /debug/queries is only served when configured
+    app = Flask(__name__)
+    init_query_stats(app, create_engine('sqlite://'))
+    assert app.test_client().get('/debug/queries').status_code == 404
@@ -0,0 +1,45 @@
+import pytest
+from podcast.adapters.service.search_index import SearchIndex
+from podcast.domainmodel.model import Podcast, Author, Category
+
+
+@pytest.fixture
+def podcasts():
+    comedy = Category(1, 'Comedy')
+    news = Category(2, 'News & Politics')
+    first = Podcast(1, Author(1, 'Robert Newsome'), 'Daily Laughs')
+    first.add_category(comedy)
+    second = Podcast(2, Author(2, 'Jane Doe'), 'The News Hour')
+    second.add_category(news)
+    third = Podcast(3, Author(3, 'Comedy Central'), 'Renewsed Stories')
+    third.add_category(comedy)
+    return [first, second, third]
+
+
+def test_search_index_substring_matches(podcasts):  # tests that any substring of a field matches, case-insensitively
+    index = SearchIndex(podcasts)
+    assert len(index) == 3
+    assert index.search('LAUGH') == [1]
+    assert index.search('ily La') == [1]
+    assert index.search('xyz') == []
+    assert index.search('q') == []
+
+
+def test_search_index_ranking(podcasts):  # tests field weighting (title > author > category) and the prefix bonus
+    index = SearchIndex(podcasts)
+    # title prefix match, then author prefix match, then a title match inside a word
+    assert index.search('news') == [2, 1, 3]
+    # author prefix match outranks category prefix match, ties keep catalogue order
+    assert index.search('comedy') == [3, 1]
+
+
+def test_search_index_empty_query(podcasts):  # tests that a blank query matches the whole catalogue in order
+    index = SearchIndex(podcasts)
+    assert index.search('  ') == [1, 2, 3]
+
+
+def test_search_index_add_podcast_clears_cached_results(podcasts):  # tests that cached results are dropped when the index grows
+    index = SearchIndex(podcasts[:1])
+    assert index.search('news') == [1]
+    index.add_podcast(podcasts[1])
+    assert index.search('news') == [2, 1]
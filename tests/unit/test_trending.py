@@ -0,0 +1,75 @@
+import math
+
+from podcast.adapters.trending import TrendingTracker, EVENT_WEIGHTS, trending_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_top_ranks_by_score():  # tests that more active podcasts rank higher
+    tracker = TrendingTracker(clock=FakeClock())
+    tracker.record(1, 'playlist_episode')
+    tracker.record(2, 'review')
+    tracker.record(3, 'playlist_podcast')
+    assert EVENT_WEIGHTS['review'] > EVENT_WEIGHTS['playlist_podcast'] > EVENT_WEIGHTS['playlist_episode']
+    assert tracker.top(2) == [2, 3]
+    assert tracker.top(10) == [2, 3, 1]
+    tracker.record(1, 'review')
+    assert tracker.top(1) == [1]
+    assert tracker.top(0) == []
+
+
+def test_recent_activity_outweighs_old_activity():  # tests the time decay of scores
+    clock = FakeClock()
+    tracker = TrendingTracker(half_life=10, clock=clock)
+    for _ in range(3):
+        tracker.record(1, 'review')
+    clock.now = 30  # three half-lives later the old reviews count for an eighth
+    tracker.record(2, 'review')
+    tracker.record(2, 'review')
+    assert tracker.top(2) == [2, 1]
+
+
+def test_capacity_is_bounded():  # tests that only the strongest podcasts are kept
+    clock = FakeClock()
+    tracker = TrendingTracker(half_life=10, capacity=3, clock=clock)
+    for podcast_id in range(3):
+        tracker.record(podcast_id, 'review')
+    tracker.record(99, 'playlist_episode')  # weaker than everything kept, so dropped
+    assert len(tracker) == 3
+    assert 99 not in tracker.top(3)
+    clock.now = 20
+    tracker.record(99, 'playlist_episode')  # newer activity outweighs the old reviews
+    assert len(tracker) == 3
+    assert tracker.top(1) == [99]
+
+
+def test_rescaling_keeps_the_ranking():  # tests that scores survive the forward decay rescale
+    clock = FakeClock()
+    tracker = TrendingTracker(half_life=1, clock=clock)
+    tracker.record(1, 'review')
+    clock.now = 10
+    tracker.record(2, 'playlist_episode')
+    clock.now = 600
+    tracker.record(3, 'playlist_episode')
+    assert tracker.top(3) == [3, 2, 1]
+    clock.now = 3000
+    tracker.record(4, 'playlist_episode')
+    assert tracker.top(3) == [4]
+
+
+def test_trending_key_matches_decayed_scores():  # tests that stored keys rank like the decayed scores they stand for
+    one_day = 24 * 60 * 60
+    now = 1_700_000_000.0
+    old = trending_key(None, 'review', now - 3 * one_day)
+    old = trending_key(old, 'review', now - 3 * one_day)
+    recent = trending_key(None, 'playlist_episode', now)
+    # two reviews three half-lives ago are worth 2 * 3 / 8, less than one playlist episode now
+    assert recent > old
+    assert math.isclose(2 ** (old - now / one_day), 0.75)
+    assert trending_key(recent, 'review', now) > recent
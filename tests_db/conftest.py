@@ -1,6 +1,8 @@
+from contextlib import contextmanager
+
 import pytest
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, clear_mappers
 
 from podcast.adapters import database_repository, repository_populate
@@ -69,3 +71,24 @@ def empty_session():
     session_factory = sessionmaker(bind=engine)
     yield session_factory()
     mapper_registry.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def count_statements(session_factory):
+    # with count_statements() as statements: collects the SQL the repository runs inside the block
+    engine = session_factory.kw['bind']
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', record_statement)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record_statement)
+
+    return counting
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker, clear_mappers
+
+from podcast.adapters import repository_populate
+from podcast.adapters.async_database_repository import AsyncSqlAlchemyRepository
+from podcast.adapters.database_engine import create_async_database_engine
+from podcast.adapters.database_repository import SqlAlchemyRepository
+from podcast.adapters.orm import map_model_to_tables, mapper_registry
+from podcast.domainmodel.model import Review, User
+from tests_db.conftest import TEST_DATA_PATH_DATABASE_LIMITED
+
+
+@pytest.fixture
+def repositories(tmp_path):
+    # the asyncio engine opens its own connections, so both repositories share a database file
+    database_uri = f"sqlite:///{tmp_path / 'podcasts.db'}"
+    clear_mappers()
+    engine = create_engine(database_uri)
+    mapper_registry.metadata.create_all(engine)
+    map_model_to_tables()
+    sync_repository = SqlAlchemyRepository(sessionmaker(autocommit=False, autoflush=True, bind=engine))
+    repository_populate.populate(TEST_DATA_PATH_DATABASE_LIMITED, sessionmaker(bind=engine), sync_repository, True)
+
+    async_engine = create_async_database_engine({'DATABASE_URI': database_uri})
+    async_repository = AsyncSqlAlchemyRepository(async_sessionmaker(async_engine, expire_on_commit=False))
+    yield sync_repository, async_repository
+    sync_repository.close_session()
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+def test_async_podcasts_page(repositories):  # tests the AsyncSqlAlchemyRepository's get_podcasts_page() matches the synchronous one
+    sync_repository, async_repository = repositories
+    for filters in ({}, {'search_title': 'the'}, {'author_id': '1'}, {'search_title': 'no such podcast'}):
+        expected = sync_repository.get_podcasts_page(1, 3, **filters)
+        page = asyncio.run(async_repository.get_podcasts_page(1, 3, **filters))
+        assert page == expected
+        for podcast in page.items:
+            assert podcast.author.name
+            assert podcast.categories is not None
+
+
+def test_async_podcast_details(repositories):  # tests the AsyncSqlAlchemyRepository's get_podcast_details() loads everything the page shows
+    sync_repository, async_repository = repositories
+    podcast = sync_repository.get_podcast(243)
+    sync_repository.add_review(Review(1, 4, "alright", User(1, 'user', 'Password1'), podcast))
+
+    details = asyncio.run(async_repository.get_podcast_details(243, 2, 3))
+    assert details.podcast.id == 243
+    assert details.podcast.author.name == podcast.author.name
+    assert len(details.podcast.categories) == len(podcast.categories)
+    assert details.episodes == sync_repository.get_episodes_page_by_podcast_id(243, 2, 3)
+    assert [review.user.username for review in details.reviews] == ['user']
+    assert details.average_rating == '4.0'
+    assert asyncio.run(async_repository.get_podcast_details(999999, 1, 3)) is None
+
+
+def test_async_single_lookups(repositories):  # tests the AsyncSqlAlchemyRepository's get_podcast(), get_reviews_by_podcast() and get_average_rating()
+    sync_repository, async_repository = repositories
+    assert asyncio.run(async_repository.get_podcast(243)) == sync_repository.get_podcast(243)
+    assert asyncio.run(async_repository.get_podcast(999999)) is None
+    assert asyncio.run(async_repository.get_reviews_by_podcast(243)) == []
+    assert asyncio.run(async_repository.get_average_rating(243)) == 'No ratings yet!'
+    assert asyncio.run(async_repository.get_average_rating(999999)) == 'No ratings yet!'
+
+
+def test_async_engine_needs_a_database_file():  # tests create_async_database_engine() refuses databases it cannot share
+    with pytest.raises(ValueError):
+        create_async_database_engine({'DATABASE_URI': 'sqlite://'})
+    with pytest.raises(ValueError):
+        create_async_database_engine({'DATABASE_URI': 'mysql://localhost/podcasts'})
@@ -0,0 +1,29 @@
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from podcast.adapters.database_engine import create_database_engine
+
+
+def test_file_database_engine(tmp_path):  # tests a file database gets a sized pool and the configured pragmas
+    engine = create_database_engine({
+        'DATABASE_URI': f'sqlite:///{tmp_path / "podcasts.db"}',
+        'DATABASE_POOL_SIZE': 3,
+        'SQLITE_SYNCHRONOUS': 'NORMAL',
+        'SQLITE_CACHE_SIZE': -8000,
+    })
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 3
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == 1
+        assert connection.exec_driver_sql('PRAGMA cache_size').scalar() == -8000
+        assert connection.exec_driver_sql('PRAGMA mmap_size').scalar() == 268435456
+    engine.dispose()
+
+
+def test_memory_database_engine():  # tests an in-memory database shares a single connection
+    engine = create_database_engine({'DATABASE_URI': 'sqlite://'})
+    assert isinstance(engine.pool, StaticPool)
+    with engine.begin() as connection:
+        connection.exec_driver_sql('CREATE TABLE t (x INTEGER)')
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('SELECT count(*) FROM t').scalar() == 0
@@ -1,7 +1,19 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event, select, inspect
+from sqlalchemy.orm import sessionmaker, clear_mappers, object_session
+
 from podcast.adapters.database_repository import SqlAlchemyRepository
+from podcast.adapters import repository_populate
 from podcast.adapters.datareader.csvdatareader import CSVDataReader
-from podcast.domainmodel.model import Podcast, Episode, Category, Author, Playlist, User, Review
+from podcast.adapters.orm import map_model_to_tables, mapper_registry, podcast_table
+from podcast.description.description import description_blueprint
+from podcast.domainmodel.model import Podcast, Episode, Category, Author, Playlist, User, Review, Chart
+from podcast.home import home_services
+from tests_db.conftest import TEST_DATA_PATH_DATABASE_LIMITED
 
 
 @pytest.fixture
@@ -96,6 +108,19 @@ def test_get_user_reviews(session_factory, temp_user, temp_podcast, temp_review)
     assert len(my_repository.get_user_reviews(temp_user.username)) == 1
 
 
+def test_get_user_reviews_page(session_factory, temp_user):  # tests the SqlAlchemyRepository's get_user_reviews_page() method
+    my_repository = SqlAlchemyRepository(session_factory)
+    podcast = my_repository.get_podcast(243)
+    for review_id in range(1, 6):
+        my_repository.add_review(Review(review_id, 3, "fine", temp_user, podcast))
+    my_repository.add_review(Review(6, 1, "no", User(2, 'other', 'Password1'), podcast))
+    reviews_page = my_repository.get_user_reviews_page(temp_user.username.upper(), 2, 2)
+    assert [review.id for review in reviews_page.items] == [3, 4]
+    assert reviews_page.total == 5
+    assert reviews_page.items[0].podcast.title == podcast.title
+    assert my_repository.get_user_reviews_page('nobody', 1, 2).total == 0
+
+
 def test_get_authors(session_factory):  # tests the SqlAlchemyRepository's get_authors() method
     my_repository = SqlAlchemyRepository(session_factory)
     authors = my_repository.get_authors()
@@ -116,6 +141,98 @@ def test_get_categories(session_factory):  # tests the SqlAlchemyRepository's ge
                           ]
 
 
+def test_get_catalogue_sidebar(session_factory, count_statements):  # tests the SqlAlchemyRepository's get_catalogue_sidebar() method
+    my_repository = SqlAlchemyRepository(session_factory)
+    sidebar = my_repository.get_catalogue_sidebar()
+    assert [category.name for category in sidebar.categories] == sorted(category.name for category in my_repository.get_categories())
+    assert [author.name for author in sidebar.authors] == sorted(author.name for author in my_repository.get_authors())
+    assert [podcast.title for podcast in sidebar.podcasts] == [podcast.title for podcast in my_repository.get_podcasts()]
+    assert sidebar.podcasts[-1] == (140, 'MarijuanaChurch')
+
+    with count_statements() as statements:
+        assert my_repository.get_catalogue_sidebar() is sidebar
+    assert statements == []
+
+
+def test_get_podcasts_page(session_factory, temp_podcast, count_statements):  # tests the SqlAlchemyRepository's get_podcasts_page() method
+    my_repository = SqlAlchemyRepository(session_factory)
+    podcasts = my_repository.get_podcasts()
+    with count_statements() as statements:
+        first_page = my_repository.get_podcasts_page(1, 3)
+    assert first_page.items == podcasts[0:3]
+    assert first_page.total == 7
+    assert first_page.total_pages == 3
+    assert any('LIMIT' in statement for statement in statements)
+    assert my_repository.get_podcasts_page(3, 3).items == podcasts[6:7]
+    assert my_repository.get_podcasts_page(1, 3, category_id='6').items == my_repository.search_podcast_by_category_id('6')
+    assert my_repository.get_podcasts_page(1, 3, author_id='7').items == [temp_podcast]
+    assert my_repository.get_podcasts_page(1, 3, title_id='140').items == [temp_podcast]
+    assert my_repository.get_podcasts_page(1, 3, search_title='marijuana').items == [temp_podcast]
+    assert my_repository.get_podcasts_page(1, 3, search_title='no such podcast').total == 0
+
+
+def test_get_episodes_page_by_podcast_id(session_factory):  # tests the SqlAlchemyRepository's get_episodes_page_by_podcast_id() method
+    my_repository = SqlAlchemyRepository(session_factory)
+    episodes = sorted(my_repository.get_episodes_by_podcast_id(243), key=lambda episode: episode.id)
+    episodes_page = my_repository.get_episodes_page_by_podcast_id(243, 2, 3)
+    assert episodes_page.items == episodes[3:4]
+    assert episodes_page.total == len(episodes) == 4
+    assert my_repository.get_episodes_page_by_podcast_id(100000, 1, 3).total == 0
+
+
+def test_get_podcast_details(session_factory, temp_user, count_statements):  # tests the page's podcast, episodes and reviews load in a fixed number of queries
+    my_repository = SqlAlchemyRepository(session_factory)
+    podcast = my_repository.get_podcast(243)
+    my_repository.add_review(Review(1, 4, "alright", temp_user, podcast))
+    my_repository.add_review(Review(2, 2, "meh", User(2, 'other', 'Password1'), podcast))
+    my_repository.close_session()
+
+    with count_statements() as statements:
+        details = my_repository.get_podcast_details(243, 2, 3)
+        assert details.podcast.author.name
+        assert len(details.podcast.categories) > 0
+        assert sorted(review.user.username for review in details.reviews) == ['amazing user', 'other']
+        assert [episode.title for episode in details.episodes.items]
+    assert len(statements) <= 4
+    assert details.episodes.total == 4
+    assert len(details.episodes.items) == 1
+    assert details.average_rating == '3.0'
+    assert my_repository.get_podcast_details(999999, 1, 3) is None
+
+
+def test_get_podcast_details_fans_out(tmp_path):  # tests get_podcast_details() loads the episodes on the executor's thread, in a session of its own
+    # a database file, so that every thread's connection sees the same data
+    clear_mappers()
+    engine = create_engine(f"sqlite:///{tmp_path / 'podcasts.db'}")
+    mapper_registry.metadata.create_all(engine)
+    map_model_to_tables()
+    session_factory = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+    repository_populate.populate(TEST_DATA_PATH_DATABASE_LIMITED, session_factory,
+                                 SqlAlchemyRepository(session_factory), True)
+
+    threads = set()
+
+    def record_thread(conn, cursor, statement, parameters, context, executemany):
+        threads.add(threading.current_thread().name)
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='query-fanout') as executor:
+        my_repository = SqlAlchemyRepository(session_factory, executor=executor)
+        event.listen(engine, 'before_cursor_execute', record_thread)
+        try:
+            details = my_repository.get_podcast_details(243, 2, 3)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record_thread)
+    my_repository.close_session()
+    engine.dispose()
+
+    assert threading.current_thread().name in threads
+    assert any(name.startswith('query-fanout') for name in threads)
+    assert details.podcast.id == 243
+    assert details.episodes.total == 4
+    assert [episode.title for episode in details.episodes.items]
+    assert object_session(details.episodes.items[0]) is None
+
+
 def test_get_episodes(session_factory, temp_episode):  # tests the SqlAlchemyRepository's get_episodes() method
     my_repository = SqlAlchemyRepository(session_factory)
     all_episodes = my_repository.get_episodes()
@@ -185,6 +302,17 @@ def test_search_podcasts_by_query(session_factory, temp_podcast):  # tests the S
     assert my_repository.search_podcasts_by_query('Dueling Genre Productions') == [Podcast(748, Author(1, 'Dueling Genre Productions'), "Lord of the Rings Minute", 'http://is4.mzstatic.com/image/thumb/Music62/v4/1a/a1/ea/1aa1eaf2-9366-0817-c4be-41f37d5f6eb7/source/600x600bb.jpg', 'The daily podcast in which hosts Cassandra and Norman analyze the Lord of the Rings (Extended Edition) trilogy one minute at a time.', 'http://www.duelinggenre.com/category/podcasts/movies-by-minute/lotr-minute/', 1155980634, 'English')]
 
 
+def test_search_round_trips(session_factory, count_statements):  # tests that searches load podcasts, authors and categories in a fixed number of queries
+    my_repository = SqlAlchemyRepository(session_factory)
+    with count_statements() as statements:
+        results = my_repository.search_podcasts_by_query('e')
+        for podcast in results:
+            assert podcast.author.name
+            assert len(podcast.categories) > 0
+    assert len(results) > 2
+    assert len(statements) <= 2
+
+
 def search_podcast_by_language():  # empty method, placeholder test for possible future implementation
     pass
 
@@ -212,6 +340,71 @@ def test_get_playlist(session_factory, temp_user):  # tests the SqlAlchemyReposi
     assert my_repository.get_playlist(temp_user) == Playlist(1, temp_user, temp_user.username + "'s Playlist", "Save episodes and whole playlists to watch later!", [], [])
 
 
+def test_get_playlist_by_user_id(session_factory, temp_user, count_statements):  # tests get_playlist() loads one user's playlist and its contents in a fixed number of queries
+    my_repository = SqlAlchemyRepository(session_factory)
+    for user_id in range(2, 12):
+        my_repository.create_playlist(User(user_id, f'user{user_id}', 'Password1'))
+    my_repository.create_playlist(temp_user)
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(718), temp_user)
+    my_repository.add_episode_to_playlist(my_repository.get_episode(3385), temp_user)
+    my_repository.close_session()
+
+    with count_statements() as statements:
+        playlist = my_repository.get_playlist(temp_user)
+        assert len(statements) <= 3
+        assert [podcast.id for podcast in playlist.podcasts] == [718]
+        assert [episode.id for episode in playlist.episodes] == [3385]
+    assert len(statements) <= 3
+    with pytest.raises(ValueError):
+        my_repository.get_playlist(User(999, 'nobody', 'Password1'))
+
+
+def test_get_playlist_summary(session_factory, temp_user, count_statements):  # tests get_playlist_summary() looks the playlist up without loading its members
+    my_repository = SqlAlchemyRepository(session_factory)
+    my_repository.create_playlist(temp_user)
+    my_repository.add_episode_to_playlist(my_repository.get_episode(3385), temp_user)
+    my_repository.close_session()
+
+    with count_statements() as statements:
+        playlist = my_repository.get_playlist_summary(temp_user)
+    assert len(statements) == 1
+    assert playlist.title == temp_user.username + "'s Playlist"
+    assert {'_episodes', '_podcasts'} <= inspect(playlist).unloaded
+    with pytest.raises(ValueError):
+        my_repository.get_playlist_summary(User(999, 'nobody', 'Password1'))
+
+
+def test_get_playlist_pages(session_factory, temp_user, count_statements):  # tests the account page's playlist and review pages load in a fixed number of queries, in the order members were added
+    my_repository = SqlAlchemyRepository(session_factory)
+    my_repository.add_review(Review(1, 4, "alright", temp_user, my_repository.get_podcast(243)))
+    my_repository.create_playlist(temp_user)
+    episodes = sorted(my_repository.get_episodes_by_podcast_id(243), key=lambda episode: episode.id)
+    added_ids = [episodes[2].id, episodes[0].id, episodes[3].id, episodes[1].id]
+    for episode_id in added_ids:
+        my_repository.add_episode_to_playlist(my_repository.get_episode(episode_id), temp_user)
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(718), temp_user)
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(243), temp_user)
+    username = temp_user.username
+    my_repository.close_session()
+    user = my_repository.get_user(username)
+
+    with count_statements() as statements:
+        episodes_page = my_repository.get_playlist_episodes_page(user, 2, 3)
+        podcasts_page = my_repository.get_playlist_podcasts_page(user, 1, 1)
+        reviews_page = my_repository.get_user_reviews_page(username, 1, 2)
+        assert [review.podcast.title for review in reviews_page.items]
+    assert len(statements) <= 5
+    assert [episode.id for episode in episodes_page.items] == added_ids[3:4]
+    assert episodes_page.total == 4
+    assert [podcast.id for podcast in podcasts_page.items] == [718]
+    assert [episode.id for episode in my_repository.get_playlist_episodes_page(user, 1, 3).items] == added_ids[0:3]
+    assert [episode.id for episode in my_repository.get_playlist(user).episodes] == added_ids
+    assert podcasts_page.total == 2
+    assert my_repository.get_playlist_episodes_page(user, 5, 3).total == 4
+    with pytest.raises(ValueError):
+        my_repository.get_playlist_podcasts_page(User(999, 'nobody', 'Password1'), 1, 1)
+
+
 def test_add_episode_to_playlist(session_factory, temp_episode, temp_podcast, temp_user):  # tests the SqlAlchemyRepository's add_episode_to_playlist() method
     my_repository = SqlAlchemyRepository(session_factory)
     with pytest.raises(ValueError) as exc_info:
@@ -236,6 +429,78 @@ def test_add_podcast_to_playlist(session_factory, temp_episode, temp_podcast, te
     assert str(exc_info.value) == "Podcast must be a Podcast object."
 
 
+def test_playlist_edits_write_single_rows(session_factory, temp_user, count_statements):  # tests playlist edits neither load the playlist nor store duplicates
+    my_repository = SqlAlchemyRepository(session_factory)
+    my_repository.create_playlist(temp_user)
+    episode = my_repository.get_episode(3385)
+    podcast = my_repository.get_podcast(718)
+
+    with count_statements() as statements:
+        my_repository.add_episode_to_playlist(episode, temp_user)
+        my_repository.add_episode_to_playlist(episode, temp_user)
+        my_repository.add_podcast_to_playlist(podcast, temp_user)
+    assert not any(statement.startswith('SELECT') and 'playlist_' in statement for statement in statements)
+    inserts = [statement for statement in statements if statement.startswith('INSERT')]
+    assert len(inserts) == 3
+    assert all('NOT (EXISTS' in statement for statement in inserts)
+
+    playlist = my_repository.get_playlist(temp_user)
+    assert playlist.episodes == [episode]
+    assert playlist.podcasts == [podcast]
+    my_repository.delete_episode_from_playlist(episode, temp_user)
+    assert my_repository.get_playlist(temp_user).episodes == []
+    with pytest.raises(ValueError) as exc_info:
+        my_repository.delete_episode_from_playlist(episode, temp_user)
+    assert str(exc_info.value) == "Episode not in Playlist."
+
+
+def test_get_trending_podcasts(session_factory, temp_user):  # tests the SqlAlchemyRepository's get_trending_podcasts() method
+    my_repository = SqlAlchemyRepository(session_factory)
+    assert my_repository.get_trending_podcasts(5) == []
+    my_repository.add_user(temp_user)
+    my_repository.create_playlist(temp_user)
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(718), temp_user)
+    assert [podcast.id for podcast in my_repository.get_trending_podcasts(5)] == [718]
+    my_repository.add_review(Review(1, 4, "alright", temp_user, my_repository.get_podcast(140)))
+    assert [podcast.id for podcast in my_repository.get_trending_podcasts(5)] == [140, 718]
+
+
+def test_trending_is_stored_in_the_database(session_factory, temp_user):  # tests every repository (worker) ranks trending podcasts the same, with recent activity first
+    class FakeClock:
+        now = 1_700_000_000.0
+
+        def __call__(self):
+            return self.now
+
+    clock = FakeClock()
+    my_repository = SqlAlchemyRepository(session_factory, clock=clock)
+    my_repository.add_user(temp_user)
+    my_repository.create_playlist(temp_user)
+    my_repository.add_review(Review(1, 4, "alright", temp_user, my_repository.get_podcast(140)))
+    version = my_repository.get_charts_version()
+    clock.now += 2 * 24 * 60 * 60
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(718), temp_user)
+    assert my_repository.get_charts_version() != version
+
+    other_repository = SqlAlchemyRepository(session_factory)
+    assert [podcast.id for podcast in other_repository.get_trending_podcasts(5)] == [718, 140]
+    assert other_repository.get_charts_version() == my_repository.get_charts_version()
+
+
+def test_repeated_playlist_adds_do_not_trend(session_factory, temp_user):  # tests a duplicate add leaves the stored trending score unchanged
+    my_repository = SqlAlchemyRepository(session_factory)
+    my_repository.create_playlist(temp_user)
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(718), temp_user)
+    my_repository.add_episode_to_playlist(my_repository.get_episode(3385), temp_user)
+    select_scores = select(podcast_table.c.podcast_id, podcast_table.c.trending_key, podcast_table.c.trending_updated)
+    with session_factory() as session:
+        scores = session.execute(select_scores).all()
+    my_repository.add_podcast_to_playlist(my_repository.get_podcast(718), temp_user)
+    my_repository.add_episode_to_playlist(my_repository.get_episode(3385), temp_user)
+    with session_factory() as session:
+        assert session.execute(select_scores).all() == scores
+
+
 def test_delete_episode_from_playlist(session_factory, temp_episode, temp_podcast, temp_user):  # tests the SqlAlchemyRepository's delete_episode_from_playlist() method
     my_repository = SqlAlchemyRepository(session_factory)
     my_repository.create_playlist(temp_user)
@@ -309,3 +574,47 @@ def test_get_average_rating(session_factory, temp_podcast, temp_review, temp_use
     my_repository.add_review(new_review2)
     assert my_repository.get_average_rating(temp_podcast.id) == '5.7'
 
+
+
+def test_add_review_increments_aggregates(session_factory, temp_user, count_statements):  # tests a new review adds to its podcast's aggregates without recounting its reviews
+    my_repository = SqlAlchemyRepository(session_factory)
+    podcast = my_repository.get_podcast(140)
+    my_repository.add_review(Review(1, 4, "alright", temp_user, podcast))
+    with count_statements() as statements:
+        my_repository.add_review(Review(2, 1, "meh", temp_user, my_repository.get_podcast(140)))
+    assert 'UPDATE podcasts SET review_count=(podcasts.review_count + ?), rating_total=(podcasts.rating_total + ?)' \
+           ' WHERE podcasts.podcast_id = ?' in statements
+    assert not any('FROM reviews' in statement for statement in statements if statement.startswith('UPDATE'))
+    assert my_repository.get_average_rating(140) == '2.5'
+
+
+def test_get_average_rating_without_queries(session_factory, temp_user, count_statements):  # tests the rating comes from the podcast's aggregates, not its reviews
+    my_repository = SqlAlchemyRepository(session_factory)
+    podcast = my_repository.get_podcast(140)
+    my_repository.add_review(Review(1, 4, "alright", temp_user, podcast))
+    review = Review(2, 3, "fine", temp_user, podcast)
+    my_repository.add_review(review)
+    my_repository.add_review(review)  # the same review again is not counted twice
+    my_repository.get_podcast(140)
+
+    with count_statements() as statements:
+        assert my_repository.get_average_rating(140) == '3.5'
+    assert statements == []
+    assert my_repository.get_average_rating(999999) == 'No ratings yet!'
+
+
+def test_warm_home_page_runs_no_queries(session_factory, count_statements, monkeypatch):  # tests a cached home page is served without touching the database
+    # the real charts pick fixed positions from the full catalogue, which the test data is too small for
+    monkeypatch.setattr(home_services, 'build_charts',
+                        lambda repository: [Chart(1, "Trending Now", repository.get_podcasts()[:2]),
+                                            Chart(2, "Editor's Picks", repository.get_podcasts()[2:4])])
+    my_repository = SqlAlchemyRepository(session_factory)
+    app = Flask('podcast')
+    app.register_blueprint(description_blueprint)
+    with app.test_request_context('/'):
+        with count_statements() as cold:
+            fragment = home_services.get_charts_fragment(my_repository)
+        with count_statements() as warm:
+            assert home_services.get_charts_fragment(my_repository) is fragment
+    assert cold
+    assert warm == []
@@ -1,5 +1,6 @@
-from sqlalchemy import select, inspect
-from podcast.adapters.orm import mapper_registry
+from sqlalchemy import select, inspect, event
+from podcast.adapters.orm import mapper_registry, create_indexes, add_review_aggregates, drop_unused_indexes, \
+    upgrade_schema, add_playlist_positions
 
 
 def test_database_populate_inspect_table_names(database_engine):  # tests if the tables have been created and the names are as expected
@@ -106,3 +107,132 @@ def test_database_populate_select_all_podcast_categories(database_engine):  # te
         assert len(all_podcast_categories) > 0
         assert all_podcast_categories[140] is not None
 
+
+
+def test_database_populate_bulk_rows(database_engine):  # tests the bulk loader links every episode to its podcast and trims dates
+    with database_engine.connect() as connection:
+        episodes = mapper_registry.metadata.tables['episodes']
+        podcasts = mapper_registry.metadata.tables['podcasts']
+        rows = connection.execute(select(episodes.c.episode_id, episodes.c.publication_date)
+                                  .join(podcasts, podcasts.c.podcast_id == episodes.c.podcast_id)).all()
+        total = connection.execute(select(episodes.c.episode_id)).all()
+
+        assert len(rows) == len(total) > 0
+        assert all(len(publication_date) == 10 for _, publication_date in rows)
+
+
+def test_database_populate_indexes(database_engine):  # tests the secondary indexes on the hot filter and join columns exist
+    with database_engine.connect() as connection:
+        index_names = set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+
+    assert {'ix_episodes_podcast_id', 'ix_reviews_podcast_id', 'ix_reviews_user_id', 'ix_playlists_user_id',
+            'ix_podcasts_author_id', 'ix_podcast_categories_category_id', 'ix_playlist_episodes_playlist_episode',
+            'ix_playlist_podcasts_playlist_podcast', 'ix_users_username_lower'} <= index_names
+    assert not index_names & {'ix_podcasts_title_lower', 'ix_authors_name_lower'}
+
+
+def test_database_username_lookup_uses_index(database_engine):  # tests the case-insensitive username lookup is index-driven
+    with database_engine.connect() as connection:
+        plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT user_id FROM users WHERE lower(username) = 'sarah'").all()
+    assert any('ix_users_username_lower' in str(row) for row in plan)
+
+
+def test_database_create_indexes_existing_database(database_engine):  # tests indexes can be added to an already populated database
+    with database_engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_episodes_podcast_id")
+    create_indexes(database_engine)
+    create_indexes(database_engine)
+    with database_engine.connect() as connection:
+        index_names = set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+    assert 'ix_episodes_podcast_id' in index_names
+
+
+def test_database_drop_unused_indexes_existing_database(database_engine):  # tests older databases lose the lower() indexes no search can use
+    with database_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE INDEX ix_podcasts_title_lower ON podcasts (lower(title))")
+        connection.exec_driver_sql("CREATE INDEX ix_authors_name_lower ON authors (lower(name))")
+    drop_unused_indexes(database_engine)
+    drop_unused_indexes(database_engine)
+    with database_engine.connect() as connection:
+        index_names = set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+    assert not index_names & {'ix_podcasts_title_lower', 'ix_authors_name_lower'}
+    assert 'ix_users_username_lower' in index_names
+
+
+def test_database_unique_playlist_members_existing_database(database_engine):  # tests older databases lose duplicate playlist members and get the unique indexes
+    with database_engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_playlist_episodes_playlist_episode")
+        connection.exec_driver_sql("CREATE INDEX ix_playlist_episodes_playlist_id ON playlist_episodes (playlist_id, episode_id)")
+        for position, episode_id in enumerate((1, 1, 2, 1), start=1):
+            connection.exec_driver_sql(
+                f"INSERT INTO playlist_episodes (playlist_id, episode_id, position) VALUES (1, {episode_id}, {position})")
+
+    upgrade_schema(database_engine)
+
+    with database_engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "SELECT playlist_id, episode_id, position FROM playlist_episodes ORDER BY episode_id").all()
+        index_names = set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+    assert rows == [(1, 1, 1), (1, 2, 3)]
+    assert 'ix_playlist_episodes_playlist_episode' in index_names
+    assert 'ix_playlist_episodes_playlist_id' not in index_names
+
+
+def test_database_upgrade_keeps_current_playlists(database_engine):  # tests upgrading a database that already has the unique indexes leaves its playlists alone
+    with database_engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO playlist_episodes (playlist_id, episode_id, position) VALUES (1, 7, 1)")
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database_engine, 'before_cursor_execute', record_statement)
+    try:
+        upgrade_schema(database_engine)
+    finally:
+        event.remove(database_engine, 'before_cursor_execute', record_statement)
+
+    assert not any(statement.startswith('DELETE') for statement in statements)
+    with database_engine.connect() as connection:
+        rows = connection.exec_driver_sql("SELECT playlist_id, episode_id, position FROM playlist_episodes").all()
+    assert rows == [(1, 7, 1)]
+
+
+def test_database_add_playlist_positions_existing_database(database_engine):  # tests older playlists get positions, numbered in member id order
+    with database_engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_playlist_episodes_playlist_position")
+        connection.exec_driver_sql("ALTER TABLE playlist_episodes DROP COLUMN position")
+        for playlist_id, episode_id in ((1, 5), (1, 3), (2, 4)):
+            connection.exec_driver_sql(
+                f"INSERT INTO playlist_episodes (playlist_id, episode_id) VALUES ({playlist_id}, {episode_id})")
+
+    add_playlist_positions(database_engine)
+    add_playlist_positions(database_engine)
+
+    with database_engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "SELECT playlist_id, episode_id, position FROM playlist_episodes ORDER BY playlist_id, position").all()
+    assert rows == [(1, 3, 1), (1, 5, 2), (2, 4, 1)]
+
+
+def test_database_add_review_aggregates_existing_database(database_engine):  # tests older databases get backfilled review aggregates
+    with database_engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO users (user_id, username, password) VALUES (1, 'sarah', 'Harper99')")
+        connection.exec_driver_sql("INSERT INTO reviews (user_id, podcast_id, comment, rating) VALUES (1, 140, 'a', 4)")
+        connection.exec_driver_sql("INSERT INTO reviews (user_id, podcast_id, comment, rating) VALUES (1, 140, 'b', 1)")
+        connection.exec_driver_sql("ALTER TABLE podcasts DROP COLUMN rating_total")
+        connection.exec_driver_sql("ALTER TABLE podcasts DROP COLUMN review_count")
+
+    add_review_aggregates(database_engine)
+    add_review_aggregates(database_engine)
+
+    with database_engine.connect() as connection:
+        rows = dict(connection.exec_driver_sql(
+            "SELECT podcast_id, review_count || '/' || rating_total FROM podcasts").all())
+    assert rows[140] == '2/5'
+    assert rows[718] == '0/0'